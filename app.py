@@ -1,12 +1,22 @@
+import os
+import threading
+from typing import TYPE_CHECKING
+from textual import work
 from textual.app import App, ComposeResult
 from textual.widgets import Header, Footer, Static, DataTable, Button, Input, TabbedContent, TabPane, Select
 from textual.containers import Container, Horizontal, Vertical
 from textual.screen import ModalScreen
-from engine import FinanceEngine, FinanceProfile, IncomeSource, Expense, BudgetStrategy
-from parser import StatementParser
+from textual.worker import get_current_worker
+from engine import PAYOFF_METHODS, FinanceEngine, FinanceProfile, IncomeSource, Expense, BudgetStrategy
 from database import DatabaseManager
-import pandas as pd
-from datetime import datetime
+from statement_view import StatementTable
+from datetime import date, datetime
+import instrumentation
+
+if TYPE_CHECKING:
+    import pandas as pd
+    from parser import StatementParser
+    from reports import LedgerReports
 
 class AddExpenseModal(ModalScreen):
     def compose(self) -> ComposeResult:
@@ -15,6 +25,8 @@ class AddExpenseModal(ModalScreen):
             yield Input(placeholder="Name (e.g. Rent)", id="exp_name")
             yield Input(placeholder="Amount", id="exp_amount")
             yield Input(placeholder="Due Day (1-31)", id="exp_day")
+            yield Input(placeholder="Debt balance (blank if not a debt)", id="exp_balance")
+            yield Input(placeholder="Debt APR %", id="exp_apr")
             with Horizontal():
                 yield Button("Cancel", id="cancel_btn")
                 yield Button("Add", variant="primary", id="add_btn")
@@ -25,7 +37,10 @@ class AddExpenseModal(ModalScreen):
                 name = self.query_one("#exp_name", Input).value
                 amount = float(self.query_one("#exp_amount", Input).value)
                 day = int(self.query_one("#exp_day", Input).value)
-                self.dismiss(Expense(name, amount, day, "Other", 1))
+                balance = float(self.query_one("#exp_balance", Input).value or 0)
+                apr = float(self.query_one("#exp_apr", Input).value or 0)
+                # A debt's amount is its monthly minimum payment
+                self.dismiss(Expense(name, amount, day, "Debt" if balance else "Other", 1, balance > 0, balance, apr))
             except ValueError:
                 self.dismiss(None)
         else:
@@ -55,6 +70,9 @@ class AddIncomeModal(ModalScreen):
         else:
             self.dismiss(None)
 
+# Extra monthly payments, on top of the strategy's, compared in the payoff table
+PAYOFF_EXTRA_STEPS = (0, 50, 100, 250)
+
 class FinFlowApp(App):
     CSS = """
     Screen { background: #1a1a1a; }
@@ -71,6 +89,8 @@ class FinFlowApp(App):
         ("d", "switch_tab('dashboard_tab')", "Dashboard"),
         ("s", "switch_tab('statements_tab')", "Statements"),
         ("e", "switch_tab('expenses_tab')", "Expenses"),
+        ("c", "cancel_analysis", "Cancel Import"),
+        ("g", "switch_tab('debug_tab')", "Debug"),
         ("q", "quit", "Quit"),
     ]
 
@@ -84,6 +104,8 @@ class FinFlowApp(App):
                         yield Static("Next Payday: [b]--[/b]", id="next_payday")
                         yield Static("Safe to Spend: [b]£0.00[/b]", id="safe_spend")
                         yield Static("Extra Debt Pay: [b]£0.00[/b]", id="extra_debt")
+                        yield Static("Debt-free: [b]--[/b]", id="debt_free")
+                        yield Static("Spending Reserve: [b]£0.00[/b]", id="variable_reserve")
                     
                     with Vertical(classes="panel"):
                         yield Static("Strategy Selection", classes="stat-label")
@@ -92,11 +114,21 @@ class FinFlowApp(App):
                             value=BudgetStrategy.BALANCED,
                             id="strategy_select"
                         )
+                        yield Static("Debt Payoff Order", classes="stat-label")
+                        yield Select([(m.capitalize(), m) for m in PAYOFF_METHODS], value="avalanche",
+                                     id="payoff_select", allow_blank=False)
+                        yield Input(placeholder="Custom order: debt names, comma separated", id="payoff_order")
                 
                 with Horizontal(id="dashboard_grid"):
                     with Vertical(classes="panel"):
                         yield Static("Upcoming Bills", classes="stat-label")
                         yield DataTable(id="upcoming_bills_table")
+                    with Vertical(classes="panel"):
+                        yield Static("Strategy Comparison", classes="stat-label")
+                        yield DataTable(id="strategy_table")
+                    with Vertical(classes="panel"):
+                        yield Static("Debt Payoff Plans", classes="stat-label")
+                        yield DataTable(id="payoff_table")
                     with Vertical(classes="panel"):
                         yield Static("Insights & Suggestions", classes="stat-label")
                         yield Static("Import a statement to see insights.", id="summary_tip")
@@ -106,7 +138,14 @@ class FinFlowApp(App):
                 with Horizontal():
                     yield Input(placeholder="Absolute path to file...", id="path_input")
                     yield Button("Analyze", variant="primary", id="analyze_btn")
-                yield DataTable(id="processed_data")
+                    yield Button("Cancel", id="cancel_analysis_btn")
+                with Horizontal():
+                    yield Input(placeholder="Category", id="filter_category")
+                    yield Input(placeholder="From (YYYY-MM-DD)", id="filter_from")
+                    yield Input(placeholder="To (YYYY-MM-DD)", id="filter_to")
+                    yield Button("All Transactions", id="ledger_btn")
+                    yield Button("Export Report", id="export_btn")
+                yield StatementTable(id="processed_data")
                 yield Static("", id="analysis_text", classes="panel")
             
             with TabPane("Expenses", id="expenses_tab"):
@@ -114,15 +153,68 @@ class FinFlowApp(App):
                 with Horizontal():
                     yield Button("Add Income Source", id="add_income_btn")
                     yield Button("Add Expense", id="add_expense_btn")
+
+            with TabPane("Debug", id="debug_tab"):
+                with Horizontal():
+                    yield Button("Enable Instrumentation", id="instrument_btn")
+                    yield Button("Profile Next Import", id="cprofile_btn")
+                    yield Button("Reset", id="reset_spans_btn")
+                    yield Button("Dump JSON", id="dump_spans_btn")
+                yield DataTable(id="spans_table")
+                yield Static("", id="debug_text", classes="panel")
         yield Footer()
 
     def on_mount(self) -> None:
         self.db = DatabaseManager()
         self.profile = self.db.load_profile()
         self.engine = FinanceEngine(self.profile)
-        self.parser = StatementParser()
+        self._parser = None
+        self._reports = None
+        self._parser_lock = threading.Lock()
+        self._analysis_lock = threading.Lock()
+        self._profile_import_to = None
+        self.query_one("#payoff_select", Select).value = self.profile.payoff_method
+        self.query_one("#payoff_order", Input).value = ", ".join(self.profile.payoff_order)
         self.refresh_dashboard()
+        self.set_interval(1.0, self.refresh_debug_panel)
+
+    def on_unmount(self) -> None:
+        self.db.close()
+
+    @property
+    def parser(self) -> "StatementParser":
+        """
+        The statement parser, created on first use. pandas and pdfplumber
+        dominate start-up time and most sessions never import a statement.
+        """
+        with self._parser_lock:
+            if self._parser is None:
+                from parser import StatementParser
+                parser = StatementParser(cache_dir=".finflow_cache")
+                parser.merchant_cache.load(self.db.load_merchant_categories(parser.rules_version))
+                parser.formats.load(self.db.load_bank_formats())
+                self._parser = parser
+            return self._parser
+
+    @property
+    def reports(self) -> "LedgerReports":
+        if self._reports is None:
+            from reports import LedgerReports
+            self._reports = LedgerReports(self.db)
+        return self._reports
 
+    def on_tabbed_content_tab_activated(self, event: TabbedContent.TabActivated) -> None:
+        if event.pane.id == "statements_tab" and self._parser is None:
+            self.load_statement_subsystem()
+        elif event.pane.id == "debug_tab":
+            self.refresh_debug_panel(force=True)
+
+    @work(thread=True, exclusive=True, group="preload")
+    def load_statement_subsystem(self) -> None:
+        # Warm the parser while the user types a path, off the event loop
+        self.parser
+
+    @instrumentation.timed("tui.refresh_dashboard")
     def refresh_dashboard(self):
         self.db.save_profile(self.profile)
         analysis = self.engine.split_money(datetime.now())
@@ -131,6 +223,12 @@ class FinFlowApp(App):
         self.query_one("#next_payday", Static).update(f"Next Payday: [b]{analysis['next_payday']}th[/b]")
         self.query_one("#safe_spend", Static).update(f"Safe to Spend: [b]£{analysis['safe_to_spend']:.2f}[/b]")
         self.query_one("#extra_debt", Static).update(f"Extra Debt Pay: [b]£{analysis['extra_debt_payment']:.2f}[/b]")
+        months = analysis['debt_free_months']
+        self.query_one("#debt_free", Static).update(
+            "Debt-free: [b]--[/b]" if months is None
+            else f"Debt-free: [b]{f'{months} months' if months >= 0 else 'not within 30 years'}[/b]")
+        self.query_one("#variable_reserve", Static).update(
+            f"Spending Reserve: [b]£{analysis['variable_reserve']:.2f}[/b]")
         
         table = self.query_one("#upcoming_bills_table", DataTable)
         table.clear()
@@ -139,10 +237,34 @@ class FinFlowApp(App):
         for bill in analysis['bills_upcoming']:
             table.add_row(bill['name'], f"{bill['due_day']}th", f"£{bill['amount']:.2f}")
 
+        comparison = self.engine.compare_strategies(datetime.now())
+        table = self.query_one("#strategy_table", DataTable)
+        table.clear()
+        if not table.columns:
+            table.add_columns("Strategy", "Safe to Spend", "Extra Debt", "Savings", "Lowest Balance")
+        for row in comparison.rows():
+            table.add_row(row['strategy'], f"£{row['safe_to_spend']:.2f}", f"£{row['extra_debt_payment']:.2f}",
+                          f"£{row['savings_contribution']:.2f}", f"£{row['projected_min_balance']:.2f}")
+
+        # Every payoff order at the current extra payment and a few larger ones, in one simulation
+        extra = analysis['extra_debt_payment']
+        plans = self.engine.plan_debt_payoff([extra + step for step in PAYOFF_EXTRA_STEPS])
+        table = self.query_one("#payoff_table", DataTable)
+        table.clear()
+        if not table.columns:
+            table.add_columns("Order", "Extra/Month", "Debt-free", "Interest", "Next Extra To")
+        for i, row in enumerate(plans.rows() if plans else []):
+            table.add_row(row['method'].capitalize(), f"£{row['extra']:.2f}",
+                          f"{row['months']} months" if row['months'] >= 0 else "30+ years",
+                          f"£{row['total_interest']:.2f}", ", ".join(plans.next_targets(i)) or "-")
+
     def on_select_changed(self, event: Select.Changed) -> None:
         if event.select.id == "strategy_select":
             self.profile.target_strategy = event.value
             self.refresh_dashboard()
+        elif event.select.id == "payoff_select" and event.value != self.profile.payoff_method:
+            self.profile.payoff_method = event.value
+            self.refresh_dashboard()
 
     async def on_button_pressed(self, event: Button.Pressed) -> None:
         if event.button.id == "add_expense_btn":
@@ -158,26 +280,196 @@ class FinFlowApp(App):
         elif event.button.id == "analyze_btn":
             path = self.query_one("#path_input", Input).value
             if path:
-                df = self.parser.parse_pdf(path) if path.lower().endswith('.pdf') else self.parser.parse_csv(path)
-                if not df.empty:
-                    self.update_statement_table(df)
-                    insights = self.parser.get_spending_insights(df)
-                    self.query_one("#analysis_text", Static).update(
-                        f"Analysis Complete!\nTotal Spent: £{abs(insights.get('total_spent', 0)):.2f}\n"
-                        f"Highest Expense: {insights.get('highest_category', 'N/A')}"
-                    )
-                    self.query_one("#summary_tip", Static).update(
-                        f"Found high spending in: {insights.get('highest_category', 'N/A')}\n"
-                        f"Switching to 'FIRE' or 'Aggressive' mode recommended."
-                    )
-
-    def update_statement_table(self, df: pd.DataFrame):
-        table = self.query_one("#processed_data", DataTable)
+                self.query_one("#analysis_text", Static).update("Starting import...")
+                self.analyze_statement(path)
+        elif event.button.id == "cancel_analysis_btn":
+            self.action_cancel_analysis()
+        elif event.button.id == "ledger_btn":
+            from statement_rows import LedgerRows
+            self.query_one("#processed_data", StatementTable).set_source(LedgerRows(self.db))
+            self.apply_statement_filter()
+        elif event.button.id == "export_btn":
+            self.export_report()
+        elif event.button.id == "instrument_btn":
+            instrumentation.enable(not instrumentation.enabled())
+            self.refresh_debug_panel(force=True)
+        elif event.button.id == "cprofile_btn":
+            self._profile_import_to = os.path.join(
+                "profiles", f"import-{datetime.now().strftime('%Y%m%d-%H%M%S')}.prof")
+            self.query_one("#debug_text", Static).update(
+                f"The next import will be profiled to {self._profile_import_to}")
+        elif event.button.id == "reset_spans_btn":
+            instrumentation.reset()
+            self.refresh_debug_panel(force=True)
+        elif event.button.id == "dump_spans_btn":
+            path = instrumentation.dump_json(
+                os.path.join("profiles", f"instrumentation-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json"))
+            self.query_one("#debug_text", Static).update(f"Wrote {path}")
+
+    def on_input_submitted(self, event: Input.Submitted) -> None:
+        if event.input.id in ("filter_category", "filter_from", "filter_to"):
+            self.apply_statement_filter()
+        elif event.input.id == "payoff_order":
+            self.profile.payoff_order = [name.strip() for name in event.value.split(",") if name.strip()]
+            self.refresh_dashboard()
+
+    def apply_statement_filter(self):
+        """
+        Filters the statement view by the category and date range inputs.
+        """
+        category = self.query_one("#filter_category", Input).value.strip() or None
+        try:
+            bounds = [
+                date.fromisoformat(value) if value else None
+                for value in (self.query_one(f"#filter_{name}", Input).value.strip() for name in ("from", "to"))
+            ]
+        except ValueError:
+            self.query_one("#analysis_text", Static).update("Dates must be YYYY-MM-DD.")
+            return
+        self.query_one("#processed_data", StatementTable).apply_filter(category, *bounds)
+
+    def export_report(self):
+        """
+        Writes the whole ledger's rollups to exports/<date>/ as JSON and CSV,
+        with a subdirectory per calendar year.
+        """
+        report = self.reports.report()
+        if not report.rows:
+            self.query_one("#analysis_text", Static).update("Nothing to export yet - import a statement first.")
+            return
+        directory = os.path.join("exports", datetime.now().strftime("%Y-%m-%d"))
+        report.export(directory)
+        # One report per calendar year for annual review and tax returns
+        for year in sorted({int(month[:4]) for month in report.by_month.index}):
+            self.reports.annual(year).export(os.path.join(directory, str(year)))
+        self.query_one("#analysis_text", Static).update(
+            f"Exported {report.rows} transactions across {len(report.by_month)} months to {directory}/")
+
+    def action_switch_tab(self, tab: str) -> None:
+        self.query_one("#tabs", TabbedContent).active = tab
+
+    def action_cancel_analysis(self) -> None:
+        if any(not w.is_finished for w in self.workers if w.group == "analysis"):
+            self.workers.cancel_group(self, "analysis")
+
+    @work(thread=True, exclusive=True, group="analysis")
+    def analyze_statement(self, path: str) -> None:
+        """
+        Parses, saves and analyses a statement off the event loop, streaming
+        progress and partial rows back to the UI as chunks finish.
+        """
+        worker = get_current_worker()
+        # A superseded import finishes its current chunk before this one starts
+        with self._analysis_lock:
+            profile_path, self._profile_import_to = self._profile_import_to, None
+            with instrumentation.profile_to(profile_path), instrumentation.span("tui.import"):
+                self._import_statement(path, worker)
+            if profile_path:
+                self.call_from_thread(self.query_one("#debug_text", Static).update,
+                                      f"Profile written to {profile_path}\n{instrumentation.profile_summary(profile_path)}")
+
+    def _import_statement(self, path: str, worker) -> None:
+        progress = {"pages": ""}
+
+        def on_pages(done: int, total: int):
+            progress["pages"] = f"{done}/{total} pages, "
+
+        chunks = []
+        rows = 0
+        workers = min(4, os.cpu_count() or 1)
+        stream = self.parser.iter_statement(path, workers=workers, progress=on_pages)
+        try:
+            for chunk in stream:
+                if worker.is_cancelled:
+                    break
+                chunks.append(chunk)
+                rows += len(chunk)
+                self.call_from_thread(self.show_statement_chunk, chunk, len(chunks) == 1,
+                                      f"Parsing... {progress['pages']}{rows} rows")
+        except Exception as e:
+            self.call_from_thread(self.query_one("#analysis_text", Static).update, f"Error reading statement: {e}")
+            return
+        finally:
+            stream.close()
+
+        self.db.save_merchant_categories(self.parser.merchant_cache.drain_new(), self.parser.rules_version)
+        self.db.save_bank_formats(self.parser.formats.drain_new())
+        if worker.is_cancelled:
+            self.call_from_thread(self.query_one("#analysis_text", Static).update, "Import cancelled.")
+            return
+        if not chunks:
+            self.call_from_thread(self.query_one("#analysis_text", Static).update, "No transactions found.")
+            return
+
+        from transactions import TransactionStore
+        try:
+            # Dates and merchants are resolved once here and shared by every analysis
+            store = TransactionStore.concat([TransactionStore.from_frame(chunk) for chunk in chunks])
+            self.call_from_thread(self.query_one("#analysis_text", Static).update, f"Saving {rows} rows...")
+            saved = self.db.import_transactions(self.parser.to_ledger_rows(store))
+            insights = self.parser.get_spending_insights(store)
+            suggestions = self.engine.analyze_spending(store)["suggestions"]
+        except Exception as e:
+            # An exception escaping the worker would take the whole app down
+            self.call_from_thread(self.query_one("#analysis_text", Static).update, f"Error analysing statement: {e}")
+            return
+        if not worker.is_cancelled:
+            self.call_from_thread(self.show_analysis, insights, suggestions, saved)
+
+    def show_statement_chunk(self, chunk: "pd.DataFrame", first: bool, status: str):
+        from statement_rows import FrameRows
+
+        self.query_one("#analysis_text", Static).update(status)
+        table = self.query_one("#processed_data", StatementTable)
+        if first:
+            table.set_source(FrameRows(chunk))
+            self.apply_statement_filter()
+        elif isinstance(table.source, FrameRows):
+            # Skipped if the user switched the table to the ledger mid-import
+            table.source.append(chunk)
+            table.refresh_rows()
+
+    def show_analysis(self, insights: dict, suggestions: list, saved: int):
+        self.query_one("#analysis_text", Static).update(
+            f"Analysis Complete!\nTotal Spent: £{abs(insights.get('total_spent', 0)):.2f}\n"
+            f"Highest Expense: {insights.get('highest_category', 'N/A')}\n"
+            f"Top Merchants: {', '.join(list(insights.get('top_merchants', {}))[:3]) or 'N/A'}\n"
+            f"New Transactions Saved: {saved}"
+        )
+        self.query_one("#summary_tip", Static).update(
+            f"Found high spending in: {insights.get('highest_category', 'N/A')}\n"
+            f"Switching to 'FIRE' or 'Aggressive' mode recommended."
+            + "".join(f"\n- {s}" for s in suggestions[:5])
+        )
+        # Forecast spending now feeds the reserve
+        self.refresh_dashboard()
+
+    def refresh_debug_panel(self, force: bool = False):
+        """
+        Shows span timings and counters, every second while the Debug tab
+        is open and instrumentation is on.
+        """
+        if not force and not (instrumentation.enabled()
+                              and self.query_one("#tabs", TabbedContent).active == "debug_tab"):
+            return
+        self.query_one("#instrument_btn", Button).label = (
+            "Disable Instrumentation" if instrumentation.enabled() else "Enable Instrumentation")
+        data = instrumentation.snapshot()
+        table = self.query_one("#spans_table", DataTable)
         table.clear()
         if not table.columns:
-            table.add_columns(*df.columns)
-        for _, row in df.iterrows():
-            table.add_row(*[str(val) for val in row])
+            table.add_columns("Span", "Calls", "Total ms", "Mean ms", "Max ms", "Last ms")
+        for name, stats in data["spans"].items():
+            table.add_row(name, str(stats["calls"]), f"{stats['total_ms']:.1f}", f"{stats['mean_ms']:.3f}",
+                          f"{stats['max_ms']:.3f}", f"{stats['last_ms']:.3f}")
+        for name, value in data["counters"].items():
+            table.add_row(name, f"{value:,}", "", "", "", "")
+
+    def update_statement_table(self, df: "pd.DataFrame"):
+        from statement_rows import FrameRows
+
+        self.query_one("#processed_data", StatementTable).set_source(FrameRows(df))
+        self.apply_statement_filter()
 
 if __name__ == "__main__":
     app = FinFlowApp()
@@ -0,0 +1,237 @@
+import difflib
+import hashlib
+import json
+import re
+from dataclasses import dataclass, replace
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from dates import detect_date_format, parse_statement_dates
+
+# Accepted source headers (normalized, see normalize_header) for each column.
+# Debit/Credit are the split money out/money in columns some banks export
+# instead of a single signed Amount.
+COLUMN_ALIASES = {
+    'Date': ['date', 'transaction date', 'posted date', 'posting date', 'booking date', 'value date',
+             'when'],
+    'Description': ['description', 'narrow description', 'transaction', 'details', 'info',
+                    'transaction description', 'narrative', 'memo', 'payee', 'reference', 'merchant'],
+    'Amount': ['amount', 'value', 'transaction amount', 'credit/debit', 'money', 'amount gbp'],
+    'Debit': ['debit', 'debit amount', 'paid out', 'money out', 'withdrawals', 'out'],
+    'Credit': ['credit', 'credit amount', 'paid in', 'money in', 'deposits', 'in'],
+}
+STANDARD_COLUMNS = ['Date', 'Description', 'Amount']
+
+# A header at least this similar to an alias (difflib ratio) still matches
+FUZZY_CUTOFF = 0.85
+# Rows read from each statement to detect its date format
+FORMAT_SAMPLE_ROWS = 200
+
+
+def normalize_header(column) -> str:
+    return re.sub(r'[^a-z0-9/]+', ' ', str(column).lower()).strip()
+
+
+def header_fingerprint(columns) -> str:
+    return hashlib.sha1('\x1f'.join(str(c) for c in columns).encode()).hexdigest()
+
+
+def resolve_columns(columns) -> Dict[str, str]:
+    """
+    Maps each standard column (and Debit/Credit) to a source column.
+
+    Exact alias matches are taken first; columns still unmatched then take a
+    near miss ("Descripton") or a header containing an alias as whole words
+    ("Transaction Date (UTC)"). Each source column is used at most once.
+    """
+    headers = [(col, normalize_header(col)) for col in columns if col is not None and normalize_header(col)]
+    resolved, used = {}, set()
+
+    def claim(target: str, matches: Callable[[str], bool]):
+        for col, name in headers:
+            if col not in used and matches(name):
+                resolved[target] = col
+                used.add(col)
+                return
+
+    for target, aliases in COLUMN_ALIASES.items():
+        claim(target, lambda name: name in aliases)
+    # Split columns go first so "Paid Out Amount" is a debit, not the amount
+    fallback_order = ['Date', 'Description', 'Debit', 'Credit', 'Amount']
+    for target in fallback_order:
+        if target not in resolved:
+            aliases = COLUMN_ALIASES[target]
+            claim(target, lambda name: bool(difflib.get_close_matches(name, aliases, n=1, cutoff=FUZZY_CUTOFF)))
+    for target in fallback_order:
+        if target not in resolved:
+            # Short aliases like 'in'/'out' would match far too much as words
+            aliases = [a for a in COLUMN_ALIASES[target] if len(a) > 3]
+            claim(target, lambda name: any(re.search(rf'\b{re.escape(a)}\b', name) for a in aliases))
+
+    if 'Amount' in resolved:
+        resolved.pop('Debit', None)
+        resolved.pop('Credit', None)
+    return resolved
+
+
+def parse_amounts(values: pd.Series) -> pd.Series:
+    """
+    Amount strings to floats: currency symbols and thousands separators are
+    dropped, (12.34) is negative, anything else unparseable becomes NaN.
+    """
+    if pd.api.types.is_numeric_dtype(values) and not pd.api.types.is_bool_dtype(values):
+        return values.astype(np.float64)
+    text = values.astype(str).str.replace(r'[£$€,\s]', '', regex=True)
+    bracketed = text.str.startswith('(') & text.str.endswith(')')
+    if bracketed.any():
+        text = text.where(~bracketed, '-' + text.str.slice(1, -1))
+    return pd.to_numeric(text, errors='coerce')
+
+
+@dataclass
+class BankFormat:
+    """
+    The resolved layout of a statement: which source column holds each
+    field and how its dates are written.
+
+    The column mapping depends only on the header, so it's what gets cached
+    and persisted. The date format is a fact about one file (a generic
+    Date,Description,Amount header is shared by banks writing dates
+    differently), so it's detected again for every statement.
+    """
+    header: List[str]
+    columns: Dict[str, str]
+    date_format: Optional[str] = None
+
+    @property
+    def fingerprint(self) -> str:
+        return header_fingerprint(self.header)
+
+    @property
+    def source_columns(self) -> List[str]:
+        return list(self.columns.values())
+
+    def for_sample(self, sample: pd.DataFrame) -> 'BankFormat':
+        """
+        This layout with the date format of the statement the sample is from.
+        """
+        date_format = None
+        if 'Date' in self.columns:
+            date_format = detect_date_format(sample.head(FORMAT_SAMPLE_ROWS)[self.columns['Date']].dropna())
+        return replace(self, date_format=date_format)
+
+    def read_csv_options(self) -> Dict:
+        """
+        read_csv arguments that read only the mapped columns with known
+        dtypes, so pandas doesn't have to infer them.
+        """
+        text = [self.columns[c] for c in ('Date', 'Description') if c in self.columns]
+        return {'usecols': self.source_columns, 'dtype': {col: str for col in text}}
+
+    def standardize(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Source rows to the standard Date/Description/Amount columns, with
+        datetime64 dates and float amounts. Amounts keep the statement's
+        own sign; split Debit/Credit columns come out with money out negative.
+        """
+        columns = self.columns
+        out = pd.DataFrame(index=df.index)
+        if 'Date' in columns:
+            out['Date'] = parse_statement_dates(df[columns['Date']], self.date_format)
+        out['Description'] = df[columns['Description']]
+        if 'Amount' in columns:
+            out['Amount'] = parse_amounts(df[columns['Amount']])
+        elif 'Debit' in columns or 'Credit' in columns:
+            out['Amount'] = self._split_amounts(df)
+        return out.dropna(subset=['Description'])
+
+    def _split_amounts(self, df: pd.DataFrame) -> pd.Series:
+        # Either side may be written signed or unsigned; rows with neither stay NaN
+        debit = parse_amounts(df[self.columns['Debit']]).abs() if 'Debit' in self.columns else None
+        credit = parse_amounts(df[self.columns['Credit']]).abs() if 'Credit' in self.columns else None
+        if debit is None:
+            return credit
+        if credit is None:
+            return -debit
+        return credit.fillna(0).sub(debit.fillna(0)).where(credit.notna() | debit.notna())
+
+    def to_json(self) -> str:
+        # Only the header's layout; the date format belongs to one file
+        return json.dumps({'header': self.header, 'columns': self.columns})
+
+    @classmethod
+    def from_json(cls, text: str) -> 'BankFormat':
+        # Older entries also hold a date format and an amount sign, which are ignored
+        data = json.loads(text)
+        return cls(data['header'], data['columns'])
+
+
+def detect_layout(header) -> Optional[BankFormat]:
+    """
+    Resolves a new header's column mapping, or None if there's no
+    description column to work with. The result has no date format yet.
+    """
+    columns = resolve_columns(header)
+    if 'Description' not in columns:
+        return None
+    return BankFormat([str(c) for c in header], {k: str(v) for k, v in columns.items()})
+
+
+def detect_format(header, sample: pd.DataFrame) -> Optional[BankFormat]:
+    """
+    Resolves a statement's layout from its header and a sample of its rows.
+    """
+    layout = detect_layout(header)
+    return layout.for_sample(sample) if layout is not None else None
+
+
+class FormatRegistry:
+    """
+    Column mappings by header fingerprint, so each header is resolved once.
+
+    Only the mapping is cached: every statement still has its date format
+    detected from its own sample, so what one file looks like never
+    changes how another with the same header is read. Headers that couldn't
+    be resolved are remembered too (for this session only), so an
+    unsupported statement is rejected from its header alone. Newly resolved
+    layouts can be drained for persistence, the same way as
+    categorizer.MerchantCache.
+    """
+
+    def __init__(self):
+        self._formats: Dict[str, Optional[BankFormat]] = {}
+        self._new: List[str] = []
+        self.hits = 0
+        self.misses = 0
+
+    def resolve(self, header, load_sample: Callable[[], pd.DataFrame]) -> Optional[BankFormat]:
+        """
+        The format of the statement with this header; load_sample supplies
+        its first rows for date format detection and isn't called for an
+        unsupported header.
+        """
+        key = header_fingerprint(header)
+        if key in self._formats:
+            self.hits += 1
+            layout = self._formats[key]
+        else:
+            self.misses += 1
+            layout = self._formats[key] = detect_layout(header)
+            if layout is not None:
+                self._new.append(key)
+        return layout.for_sample(load_sample()) if layout is not None else None
+
+    def load(self, entries: Iterable[Tuple[str, str]]):
+        for key, text in entries:
+            self._formats[key] = BankFormat.from_json(text)
+
+    def drain_new(self) -> List[Tuple[str, str]]:
+        entries = [(key, self._formats[key].to_json()) for key in self._new]
+        self._new = []
+        return entries
+
+    def stats(self) -> Dict[str, int]:
+        return {'size': sum(1 for f in self._formats.values() if f is not None),
+                'hits': self.hits, 'misses': self.misses}
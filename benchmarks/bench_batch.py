@@ -0,0 +1,41 @@
+"""
+Measures the headless CLI on a year of monthly statements with an
+increasing number of worker processes, to check it scales with cores.
+
+Usage: python benchmarks/bench_batch.py [--rows-per-statement N] [--workers 1 2 4 ...]
+"""
+import argparse
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cli import process_statements
+from benchmarks.synthetic import write_csv
+
+
+def run(rows_per_statement: int, worker_counts):
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = [write_csv(os.path.join(tmp, f"statement_{month:02d}.csv"), rows_per_statement, seed=month)
+                 for month in range(12)]
+        print(f"{len(paths)} statements x {rows_per_statement} rows, {os.cpu_count()} cores")
+        print(f"{'workers':>8} {'total (s)':>10} {'rows/s':>11} {'speedup':>8}")
+        baseline = None
+        for workers in worker_counts:
+            db_path = os.path.join(tmp, f"bench_{workers}.db")
+            summary = process_statements(paths, db_path, workers)
+            totals = summary["totals"]
+            if totals["failed"] or totals["new_rows"] != totals["rows"]:
+                raise AssertionError(f"Batch run with {workers} workers lost rows: {totals}")
+            baseline = baseline or totals["seconds"]
+            print(f"{workers:>8} {totals['seconds']:>10.2f} {totals['rows_per_second']:>11,.0f} "
+                  f"{baseline / totals['seconds']:>7.2f}x")
+
+
+if __name__ == "__main__":
+    cli = argparse.ArgumentParser()
+    cli.add_argument("--rows-per-statement", type=int, default=20_000)
+    cli.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    options = cli.parse_args()
+    run(options.rows_per_statement, options.workers)
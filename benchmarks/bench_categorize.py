@@ -0,0 +1,32 @@
+"""
+Compares per-row categorization against the compiled, vectorized matcher,
+with a cold and a warm merchant cache.
+
+Usage: python benchmarks/bench_categorize.py [rows ...]
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from parser import StatementParser
+from benchmarks.synthetic import make_statement, time_call
+
+
+def run(sizes):
+    print(f"{'rows':>10} {'per-row (s)':>12} {'cold (s)':>10} {'warm (s)':>10} {'speedup':>8}")
+    for rows in sizes:
+        parser = StatementParser()
+        descriptions = make_statement(rows)['Description']
+
+        expected, per_row = time_call(descriptions.apply, parser._categorize)
+        actual, cold = time_call(parser._categorize_series, descriptions)
+        _, warm = time_call(parser._categorize_series, descriptions)
+
+        if not (expected == actual).all():
+            raise AssertionError(f"Vectorized categories differ from per-row results at {rows} rows")
+        print(f"{rows:>10} {per_row:>12.3f} {cold:>10.3f} {warm:>10.3f} {per_row / cold:>7.1f}x")
+
+
+if __name__ == "__main__":
+    run([int(a) for a in sys.argv[1:]] or [10_000, 100_000, 1_000_000])
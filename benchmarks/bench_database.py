@@ -0,0 +1,54 @@
+"""
+Times DatabaseManager startup and load_profile/save_profile round-trips,
+saving one changed expense per round like the TUI does after each action.
+
+Usage: python benchmarks/bench_database.py [expenses] [rounds]
+"""
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import DatabaseManager
+from engine import Expense, IncomeSource
+
+
+def run(expenses: int, rounds: int):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        db = DatabaseManager(path)
+        profile = db.load_profile()
+        profile.income_sources = [IncomeSource(f"Job {i}", 1500.0, [1 + i % 28]) for i in range(10)]
+        profile.expenses = [Expense(f"Bill {i}", 10.0 + i % 90, 1 + i % 28, "Other") for i in range(expenses)]
+        db.save_profile(profile)
+
+        start = time.perf_counter()
+        for _ in range(rounds):
+            manager = DatabaseManager(path)
+            # Older DatabaseManager versions had no close()
+            getattr(manager, "close", lambda: None)()
+        startup = (time.perf_counter() - start) / rounds * 1000
+
+        start = time.perf_counter()
+        for i in range(rounds):
+            profile = db.load_profile()
+            profile.expenses[i % expenses].amount += 1
+            db.save_profile(profile)
+        round_trip = (time.perf_counter() - start) / rounds * 1000
+
+        start = time.perf_counter()
+        for _ in range(rounds):
+            db.save_profile(profile)
+        noop_save = (time.perf_counter() - start) / rounds * 1000
+
+    print(f"expenses={expenses} rounds={rounds}")
+    print(f"  startup:              {startup:8.3f} ms")
+    print(f"  load+save round-trip: {round_trip:8.3f} ms")
+    print(f"  unchanged save:       {noop_save:8.3f} ms")
+
+
+if __name__ == "__main__":
+    args = [int(a) for a in sys.argv[1:]]
+    run(args[0] if args else 1000, args[1] if len(args) > 1 else 200)
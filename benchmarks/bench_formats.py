@@ -0,0 +1,59 @@
+"""
+Measures bank-format detection and the typed CSV reader it enables:
+reading a statement with inferred dtypes and per-value date inference
+against reading it with the cached format's dtypes and date format, and
+a first import (layout resolved) against a later one (layout cached).
+
+Usage: python benchmarks/bench_formats.py [rows ...]
+"""
+import os
+import sys
+import tempfile
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bank_formats import FORMAT_SAMPLE_ROWS, detect_format, parse_amounts
+from dates import parse_statement_dates
+from parser import StatementParser
+from benchmarks.synthetic import write_csv, time_call
+
+
+def _read_inferred(path):
+    df = pd.read_csv(path)
+    return parse_statement_dates(df['Date']), parse_amounts(df['Amount'])
+
+
+def _read_typed(path, fmt):
+    df = pd.read_csv(path, **fmt.read_csv_options())
+    return (parse_statement_dates(df[fmt.columns['Date']], fmt.date_format),
+            parse_amounts(df[fmt.columns['Amount']]))
+
+
+def run(sizes):
+    print(f"{'rows':>10} {'detect (ms)':>12} {'inferred (s)':>13} {'typed (s)':>10} {'speedup':>8} "
+          f"{'first import (s)':>17} {'later import (s)':>17}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for rows in sizes:
+            path = write_csv(os.path.join(tmp, f"statement_{rows}.csv"), rows)
+            header = pd.read_csv(path, nrows=0).columns
+            fmt, detect = time_call(lambda: detect_format(header, pd.read_csv(path, nrows=FORMAT_SAMPLE_ROWS, dtype=str)))
+
+            (inferred_dates, _), inferred = time_call(_read_inferred, path)
+            (typed_dates, _), typed = time_call(_read_typed, path, fmt)
+            if not inferred_dates.equals(typed_dates):
+                raise AssertionError(f"Typed reader parsed different dates at {rows} rows")
+
+            # Same warm merchant cache for both imports, so only format handling differs
+            parser = StatementParser()
+            parser._categorize_series(pd.read_csv(path, usecols=['Description'])['Description'])
+            parser.formats = type(parser.formats)()
+            _, first = time_call(parser.parse_csv, path)
+            _, later = time_call(parser.parse_csv, path)
+            print(f"{rows:>10} {detect * 1000:>12.1f} {inferred:>13.3f} {typed:>10.3f} {inferred / typed:>7.2f}x "
+                  f"{first:>17.3f} {later:>17.3f}")
+
+
+if __name__ == "__main__":
+    run([int(a) for a in sys.argv[1:]] or [10_000, 100_000, 1_000_000])
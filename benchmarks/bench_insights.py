@@ -0,0 +1,41 @@
+"""
+Measures insights report generation against row count: the single-pass
+cube over a parsed statement, the same report from one SQL query against
+the ledger, and a cached repeat.
+
+Usage: python benchmarks/bench_insights.py [rows ...]
+"""
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import DatabaseManager
+from parser import StatementParser
+from reports import LedgerReports
+from benchmarks.synthetic import make_statement, time_call
+
+
+def run(sizes):
+    parser = StatementParser()
+    print(f"{'rows':>10} {'frame (s)':>10} {'rows/s':>11} {'ledger (s)':>11} {'cached (ms)':>12}")
+    for rows in sizes:
+        df = parser._standardize_df(make_statement(rows))
+        report, frame = time_call(parser.get_spending_report, df)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            db = DatabaseManager(os.path.join(tmp, "bench.db"))
+            db.import_transactions(parser.to_ledger_rows(df))
+            reports = LedgerReports(db)
+            from_ledger, ledger = time_call(reports.report)
+            _, cached = time_call(reports.report)
+            db.close()
+
+        if report.rows != rows or abs(report.spent - from_ledger.spent) > 1e-6 * max(1.0, report.spent):
+            raise AssertionError(f"Ledger and statement reports disagree at {rows} rows")
+        print(f"{rows:>10} {frame:>10.3f} {rows / frame:>11,.0f} {ledger:>11.3f} {cached * 1000:>12.2f}")
+
+
+if __name__ == "__main__":
+    run([int(a) for a in sys.argv[1:]] or [10_000, 100_000, 1_000_000])
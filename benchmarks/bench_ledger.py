@@ -0,0 +1,50 @@
+"""
+Measures bulk ingestion of parsed statements into the SQLite ledger and
+indexed range/category queries.
+
+Usage: python benchmarks/bench_ledger.py [rows ...]
+"""
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import DatabaseManager
+from parser import StatementParser
+from benchmarks.synthetic import make_statement
+
+
+def run(sizes):
+    parser = StatementParser()
+    print(f"{'rows':>10} {'to rows (s)':>12} {'insert (s)':>11} {'re-insert (s)':>14} {'query (ms)':>11}")
+    for rows in sizes:
+        df = parser._standardize_df(make_statement(rows))
+        with tempfile.TemporaryDirectory() as tmp:
+            db = DatabaseManager(os.path.join(tmp, "bench.db"))
+
+            start = time.perf_counter()
+            ledger_rows = parser.to_ledger_rows(df)
+            convert = time.perf_counter() - start
+
+            start = time.perf_counter()
+            inserted = db.import_transactions(ledger_rows)
+            insert = time.perf_counter() - start
+
+            # Importing the same statement again must add nothing
+            start = time.perf_counter()
+            duplicates = db.import_transactions(ledger_rows)
+            reinsert = time.perf_counter() - start
+            if inserted != len(ledger_rows) or duplicates:
+                raise AssertionError(f"Expected {len(ledger_rows)} new rows and no duplicates, "
+                                     f"got {inserted} and {duplicates}")
+
+            start = time.perf_counter()
+            db.query_transactions("2021-01-01", "2021-03-31", category="Groceries")
+            query = (time.perf_counter() - start) * 1000
+        print(f"{rows:>10} {convert:>12.3f} {insert:>11.3f} {reinsert:>14.3f} {query:>11.2f}")
+
+
+if __name__ == "__main__":
+    run([int(a) for a in sys.argv[1:]] or [10_000, 100_000, 1_000_000])
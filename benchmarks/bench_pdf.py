@@ -0,0 +1,44 @@
+"""
+Compares serial and process-pool PDF extraction on generated statements.
+
+Usage: python benchmarks/bench_pdf.py [pages ...] [--workers N]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from parser import StatementParser
+from benchmarks.synthetic import write_pdf
+
+
+def run(page_counts, workers):
+    parser = StatementParser()
+    print(f"{'pages':>6} {'serial (s)':>11} {f'{workers} workers (s)':>15} {'speedup':>8} {'slowest page (s)':>17}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for pages in page_counts:
+            path = write_pdf(os.path.join(tmp, f"statement_{pages}.pdf"), pages)
+
+            start = time.perf_counter()
+            expected = parser.parse_pdf(path)
+            serial = time.perf_counter() - start
+
+            start = time.perf_counter()
+            actual = parser.parse_pdf(path, workers=workers)
+            parallel = time.perf_counter() - start
+
+            if not expected.equals(actual):
+                raise AssertionError(f"Parallel extraction differs from serial at {pages} pages")
+            slowest = max(elapsed for _, elapsed in parser.last_page_timings)
+            print(f"{pages:>6} {serial:>11.3f} {parallel:>15.3f} {serial / parallel:>7.1f}x {slowest:>17.3f}")
+
+
+if __name__ == "__main__":
+    cli = argparse.ArgumentParser()
+    cli.add_argument("pages", nargs="*", type=int, default=[20, 50, 200])
+    cli.add_argument("--workers", type=int, default=os.cpu_count() or 2)
+    args = cli.parse_args()
+    run(args.pages, args.workers)
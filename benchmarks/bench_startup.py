@@ -0,0 +1,103 @@
+"""
+Tracks TUI start-up latency: the import cost of app.py (parsed from
+`python -X importtime`) and the time until the first frame is drawn
+headlessly. Fails if a heavy module sneaks back into the start-up path
+or the import time exceeds --max-import-ms.
+
+Usage: python benchmarks/bench_startup.py [--runs N] [--top N] [--max-import-ms MS]
+"""
+import argparse
+import os
+import re
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules that must only load once a statement is imported
+DEFERRED_MODULES = ('pandas', 'pdfplumber', 'parser', 'reports', 'statement_rows')
+
+_IMPORTTIME_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)")
+
+_FIRST_FRAME = """
+import asyncio, sys, time
+start = time.perf_counter()
+from app import FinFlowApp
+
+async def main():
+    app = FinFlowApp()
+    async with app.run_test() as pilot:
+        await pilot.pause()
+        print(time.perf_counter() - start)
+        print(",".join(m for m in {deferred!r} if m in sys.modules))
+
+asyncio.run(main())
+"""
+
+
+def parse_importtime(stderr: str):
+    """
+    Returns {module: (self_us, cumulative_us, depth)} from -X importtime output.
+    """
+    modules = {}
+    for line in stderr.splitlines():
+        match = _IMPORTTIME_LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            modules[name] = (int(self_us), int(cumulative_us), (len(indent) - 1) // 2)
+    return modules
+
+
+def import_profile():
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", "import app"],
+                            cwd=ROOT, capture_output=True, text=True, check=True)
+    return parse_importtime(result.stderr)
+
+
+def first_frame():
+    # Run from an empty directory so the real finflow.db isn't touched
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(os.environ, PYTHONPATH=ROOT)
+        result = subprocess.run([sys.executable, "-c", _FIRST_FRAME.format(deferred=DEFERRED_MODULES)],
+                                cwd=tmp, env=env, capture_output=True, text=True, check=True)
+    seconds, loaded = result.stdout.splitlines()[-2:]
+    return float(seconds), [m for m in loaded.split(",") if m]
+
+
+def run(runs: int, top: int, max_import_ms: float) -> int:
+    profiles = [import_profile() for _ in range(runs)]
+    # Best of N, as timing noise only ever adds
+    best = min(profiles, key=lambda p: p['app'][1])
+    import_ms = best['app'][1] / 1000
+
+    print(f"app import: {import_ms:.1f} ms (best of {runs})")
+    print(f"\n{'cumulative (ms)':>16} {'self (ms)':>10}  module")
+    direct = [(name, stats) for name, stats in best.items() if stats[2] <= 1 and name != 'app']
+    for name, (self_us, cumulative_us, _) in sorted(direct, key=lambda item: -item[1][1])[:top]:
+        print(f"{cumulative_us / 1000:>16.1f} {self_us / 1000:>10.1f}  {name}")
+
+    frames = [first_frame() for _ in range(runs)]
+    print(f"\nfirst frame: {min(s for s, _ in frames) * 1000:.1f} ms (best of {runs})")
+
+    failures = []
+    eager = [m for m in DEFERRED_MODULES if m in best]
+    if eager:
+        failures.append(f"imported by app at start-up: {', '.join(eager)}")
+    mounted = sorted({m for _, loaded in frames for m in loaded})
+    if mounted:
+        failures.append(f"loaded before the first frame: {', '.join(mounted)}")
+    if max_import_ms and import_ms > max_import_ms:
+        failures.append(f"app import took {import_ms:.1f} ms, limit is {max_import_ms:.1f} ms")
+    for failure in failures:
+        print(f"REGRESSION: {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    args = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    args.add_argument("--runs", type=int, default=3)
+    args.add_argument("--top", type=int, default=10, help="heaviest direct imports to list")
+    args.add_argument("--max-import-ms", type=float, default=0.0, help="fail above this app import time")
+    options = args.parse_args()
+    sys.exit(run(options.runs, options.top, options.max_import_ms))
@@ -0,0 +1,41 @@
+"""
+Compares the parsed-statement DataFrame with the compact TransactionStore:
+memory held, and the time taken by get_spending_insights and
+FinanceEngine.analyze_spending on each.
+
+Usage: python benchmarks/bench_store.py [rows ...]
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from engine import FinanceEngine, FinanceProfile
+from parser import StatementParser
+from transactions import TransactionStore
+from benchmarks.synthetic import make_statement, time_call
+
+
+def run(sizes):
+    parser = StatementParser()
+    print(f"{'rows':>10} {'frame MB':>9} {'store MB':>9} {'ratio':>6} {'convert (s)':>12} "
+          f"{'insights df/store (s)':>22} {'analyze df/store (s)':>21}")
+    for rows in sizes:
+        df = parser._standardize_df(make_statement(rows))
+        store, convert = time_call(TransactionStore.from_frame, df)
+
+        frame_insights, insights_df = time_call(parser.get_spending_insights, df)
+        store_insights, insights_store = time_call(parser.get_spending_insights, store)
+        _, analyze_df = time_call(FinanceEngine(FinanceProfile()).analyze_spending, df)
+        _, analyze_store = time_call(FinanceEngine(FinanceProfile()).analyze_spending, store)
+        if frame_insights["summary"].keys() != store_insights["summary"].keys():
+            raise AssertionError(f"Store and DataFrame insights differ at {rows} rows")
+
+        frame_mb = df.memory_usage(deep=True).sum() / 1e6
+        store_mb = store.nbytes / 1e6
+        print(f"{rows:>10} {frame_mb:>9.1f} {store_mb:>9.1f} {frame_mb / store_mb:>5.1f}x {convert:>12.3f} "
+              f"{insights_df:>10.3f} / {insights_store:<9.3f} {analyze_df:>9.3f} / {analyze_store:<9.3f}")
+
+
+if __name__ == "__main__":
+    run([int(a) for a in sys.argv[1:]] or [10_000, 100_000, 1_000_000])
@@ -0,0 +1,331 @@
+"""
+Runs the benchmark suite on deterministic synthetic data and saves the
+timings as JSON, optionally flagging regressions against an earlier run.
+
+Covers parse_csv, parse_pdf, per-row and vectorized categorization,
+get_spending_insights, split_money, debt payoff planning,
+load_profile/save_profile and table population in the TUI (the
+virtualized statement table and the dashboard's DataTables).
+
+Usage: python benchmarks/suite.py [--preset quick|full] [--only NAME ...] [--repeat N]
+                                  [--output PATH] [--compare PATH|latest] [--threshold 0.1]
+
+Exits with status 1 when --compare finds a case slower than the baseline
+by more than the threshold.
+"""
+import argparse
+import asyncio
+import gc
+import glob
+import json
+import math
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pandas as pd
+
+from database import DatabaseManager
+from parser import StatementParser
+from benchmarks.synthetic import make_profile, make_statement, write_csv, write_pdf
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+
+# Sizes per preset: statement rows, PDF pages, (expenses, incomes) profiles and table rows
+PRESETS = {
+    "quick": {
+        "csv_rows": [10_000, 100_000],
+        "pdf_pages": [5, 20],
+        "categorize_rows": [10_000],
+        "insights_rows": [100_000],
+        "profiles": [(1_000, 50), (5_000, 200)],
+        "payoff_extras": 101,
+        "table_rows": [100_000],
+    },
+    "full": {
+        "csv_rows": [10_000, 100_000, 1_000_000],
+        "pdf_pages": [5, 50, 200],
+        "categorize_rows": [10_000, 100_000],
+        "insights_rows": [100_000, 1_000_000],
+        "profiles": [(1_000, 50), (5_000, 200), (20_000, 1_000)],
+        "payoff_extras": 201,
+        "table_rows": [100_000, 1_000_000],
+    },
+}
+
+# Every split_money call uses the same date so runs are comparable
+AS_OF = datetime(2024, 3, 10)
+# Shorter calls are repeated within a sample to get above timer and scheduler noise
+MIN_SAMPLE_S = 0.02
+
+
+def measure(fn: Callable, repeat: int, setup: Optional[Callable] = None) -> Dict:
+    """
+    Times fn(*setup()) over `repeat` samples after an untimed warm-up;
+    setup's own cost is not counted. Calls quicker than MIN_SAMPLE_S are
+    batched so each sample lasts about that long, and times are per call.
+    The garbage collector is paused while timing, as in timeit.
+    """
+    setup = setup or (lambda: ())
+
+    def timed_call():
+        args = setup()
+        gc.disable()
+        try:
+            start = time.perf_counter()
+            fn(*args)
+            return time.perf_counter() - start
+        finally:
+            gc.enable()
+
+    number = max(1, math.ceil(MIN_SAMPLE_S / max(timed_call(), 1e-9)))
+    runs = [sum(timed_call() for _ in range(number)) / number for _ in range(repeat)]
+    return {"median_s": statistics.median(runs), "min_s": min(runs), "mean_s": statistics.fmean(runs),
+            "calls_per_sample": number, "runs": runs}
+
+
+def bench_parse_csv(tmp: str, sizes: List[int], repeat: int, results: Dict):
+    for rows in sizes:
+        path = write_csv(os.path.join(tmp, f"statement_{rows}.csv"), rows)
+        # A fresh parser each time: cold merchant cache and bank-format registry, no import cache
+        results[f"parse_csv[{rows}]"] = measure(lambda p: p.parse_csv(path), repeat,
+                                                setup=lambda: (StatementParser(),))
+
+
+def bench_parse_pdf(tmp: str, sizes: List[int], repeat: int, results: Dict):
+    try:
+        import reportlab  # noqa: F401
+    except ImportError:
+        print("  reportlab not installed; skipping parse_pdf", file=sys.stderr)
+        return
+    for pages in sizes:
+        path = write_pdf(os.path.join(tmp, f"statement_{pages}.pdf"), pages)
+        results[f"parse_pdf[{pages} pages]"] = measure(lambda p: p.parse_pdf(path), repeat,
+                                                       setup=lambda: (StatementParser(),))
+
+
+def bench_categorize(sizes: List[int], repeat: int, results: Dict):
+    for rows in sizes:
+        descriptions = make_statement(rows)['Description']
+        results[f"categorize_per_row[{rows}]"] = measure(
+            lambda p: descriptions.map(p._categorize), repeat, setup=lambda: (StatementParser(),))
+        results[f"categorize_series[{rows}]"] = measure(
+            lambda p: p._categorize_series(descriptions), repeat, setup=lambda: (StatementParser(),))
+
+
+def bench_insights(sizes: List[int], repeat: int, results: Dict):
+    parser = StatementParser()
+    for rows in sizes:
+        df = parser._standardize_df(make_statement(rows))
+        results[f"get_spending_insights[{rows}]"] = measure(parser.get_spending_insights, repeat,
+                                                            setup=lambda: (df,))
+
+
+def bench_payoff(profiles, extras: int, repeat: int, results: Dict):
+    from engine import FinanceEngine
+
+    for expenses, incomes in profiles:
+        engine = FinanceEngine(make_profile(expenses, incomes))
+        candidates = np.linspace(0, 2_000, extras)
+        debts = sum(1 for e in engine.profile.expenses if e.is_debt)
+        # Avalanche and snowball at every candidate extra payment, over the full 30-year horizon
+        results[f"plan_debt_payoff[{debts} debts x {2 * extras} plans]"] = measure(
+            engine.plan_debt_payoff, repeat, setup=lambda: (candidates,))
+
+
+def bench_profiles(tmp: str, sizes, repeat: int, results: Dict):
+    from engine import FinanceEngine
+
+    for expenses, incomes in sizes:
+        label = f"{expenses} expenses/{incomes} incomes"
+        engine = FinanceEngine(make_profile(expenses, incomes))
+        results[f"split_money[{label}]"] = measure(engine.split_money, repeat, setup=lambda: (AS_OF,))
+
+        counter = iter(range(1_000_000))
+
+        def fresh_db():
+            return DatabaseManager(os.path.join(tmp, f"profile_{expenses}_{incomes}_{next(counter)}.db")), \
+                make_profile(expenses, incomes)
+        results[f"save_profile_full[{label}]"] = measure(lambda db, profile: db.save_profile(profile), repeat,
+                                                         setup=fresh_db)
+
+        db, profile = fresh_db()
+        db.save_profile(profile)
+        results[f"load_profile[{label}]"] = measure(db.load_profile, repeat)
+
+        def one_change():
+            profile.expenses[len(profile.expenses) // 2].amount += 1
+            return (profile,)
+        results[f"save_profile_one_change[{label}]"] = measure(db.save_profile, repeat, setup=one_change)
+
+
+def bench_statement_table(sizes: List[int], repeat: int, results: Dict):
+    from textual.app import App
+
+    from statement_rows import FrameRows
+    from statement_view import StatementTable
+
+    class TableApp(App):
+        def compose(self):
+            yield StatementTable()
+
+    async def run():
+        parser = StatementParser()
+        async with TableApp().run_test(size=(160, 50)) as pilot:
+            await pilot.pause()
+            table = pilot.app.query_one(StatementTable)
+            for rows in sizes:
+                df = parser._standardize_df(make_statement(rows))
+
+                # set_source plus drawing every visible line, i.e. the first frame
+                def populate(frame):
+                    table.set_source(FrameRows(frame))
+                    return [table.render_line(y) for y in range(table.size.height)]
+                results[f"statement_table_first_frame[{rows}]"] = measure(populate, repeat, setup=lambda: (df,))
+
+    asyncio.run(run())
+
+
+def bench_dashboard(tmp: str, sizes, repeat: int, results: Dict):
+    from app import FinFlowApp
+
+    async def run(expenses: int, incomes: int):
+        async with FinFlowApp().run_test(size=(160, 50)) as pilot:
+            await pilot.pause()
+            app = pilot.app
+            app.profile = app.engine.profile = make_profile(expenses, incomes)
+            # The warm-up call saves the new profile; timed calls only rebuild the tables
+            results[f"dashboard_tables[{expenses} expenses/{incomes} incomes]"] = measure(
+                app.refresh_dashboard, repeat)
+
+    cwd = os.getcwd()
+    # FinFlowApp opens finflow.db in the working directory
+    os.chdir(tmp)
+    try:
+        for expenses, incomes in sizes:
+            asyncio.run(run(expenses, incomes))
+            os.remove("finflow.db")
+    finally:
+        os.chdir(cwd)
+
+
+CASES = {
+    "parse_csv": lambda tmp, preset, repeat, results: bench_parse_csv(tmp, preset["csv_rows"], repeat, results),
+    "parse_pdf": lambda tmp, preset, repeat, results: bench_parse_pdf(tmp, preset["pdf_pages"], repeat, results),
+    "categorize": lambda tmp, preset, repeat, results: bench_categorize(preset["categorize_rows"], repeat, results),
+    "insights": lambda tmp, preset, repeat, results: bench_insights(preset["insights_rows"], repeat, results),
+    "profile": lambda tmp, preset, repeat, results: bench_profiles(tmp, preset["profiles"], repeat, results),
+    "payoff": lambda tmp, preset, repeat, results: bench_payoff(preset["profiles"], preset["payoff_extras"], repeat,
+                                                                results),
+    "statement_table": lambda tmp, preset, repeat, results: bench_statement_table(preset["table_rows"], repeat,
+                                                                                  results),
+    "dashboard": lambda tmp, preset, repeat, results: bench_dashboard(tmp, preset["profiles"], repeat, results),
+}
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_suite(preset: str, only: Optional[List[str]], repeat: int) -> Dict:
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, case in CASES.items():
+            if only and name not in only:
+                continue
+            print(f"{name}...", file=sys.stderr)
+            case(tmp, PRESETS[preset], repeat, results)
+    return {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "commit": _git_commit(),
+            "preset": preset,
+            "repeat": repeat,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "pandas": pd.__version__,
+            "numpy": np.__version__,
+        },
+        "results": results,
+    }
+
+
+def compare(current: Dict, baseline: Dict, threshold: float) -> List[str]:
+    """
+    Prints each case's best time against the baseline's and returns the
+    cases slower by more than `threshold` (a fraction). The best of several
+    samples is far less noisy than the mean or median.
+    """
+    regressions = []
+    print(f"{'case':<55} {'baseline (s)':>13} {'current (s)':>12} {'change':>8}")
+    for name, result in current["results"].items():
+        before = baseline["results"].get(name)
+        if before is None:
+            print(f"{name:<55} {'-':>13} {result['min_s']:>12.4f} {'new':>8}")
+            continue
+        change = result["min_s"] / before["min_s"] - 1
+        flag = ""
+        if change > threshold:
+            regressions.append(name)
+            flag = "  REGRESSION"
+        print(f"{name:<55} {before['min_s']:>13.4f} {result['min_s']:>12.4f} {change:>+7.1%}{flag}")
+    return regressions
+
+
+def _latest_result() -> Optional[str]:
+    paths = sorted(glob.glob(os.path.join(RESULTS_DIR, "*.json")), key=os.path.getmtime)
+    return paths[-1] if paths else None
+
+
+def main(argv=None) -> int:
+    args = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    args.add_argument("--preset", choices=sorted(PRESETS), default="quick")
+    args.add_argument("--only", nargs="+", choices=sorted(CASES), help="run just these cases")
+    args.add_argument("--repeat", type=int, default=5, help="timed samples per case (after one warm-up)")
+    args.add_argument("--output", help=f"results file (default: a timestamped file in {RESULTS_DIR})")
+    args.add_argument("--compare", help="baseline results file, or 'latest' for the newest saved run")
+    args.add_argument("--threshold", type=float, default=0.10,
+                      help="slowdown of the best time, as a fraction, that counts as a regression")
+    options = args.parse_args(argv)
+
+    baseline_path = _latest_result() if options.compare == "latest" else options.compare
+    if options.compare and not baseline_path:
+        print("No saved results to compare against.", file=sys.stderr)
+
+    current = run_suite(options.preset, options.only, options.repeat)
+    output = options.output or os.path.join(
+        RESULTS_DIR, f"{datetime.now().strftime('%Y%m%d-%H%M%S')}-{current['meta']['commit'] or 'nogit'}.json")
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(current, f, indent=4)
+    print(f"Results written to {output}", file=sys.stderr)
+
+    if not baseline_path:
+        for name, result in current["results"].items():
+            print(f"{name:<55} {result['min_s']:>10.4f} s")
+        return 0
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    print(f"Compared with {baseline_path} ({baseline['meta'].get('commit')}, {baseline['meta'].get('timestamp')})")
+    regressions = compare(current, baseline, options.threshold)
+    if regressions:
+        print(f"{len(regressions)} regression(s) over {options.threshold:.0%}", file=sys.stderr)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,186 @@
+import hashlib
+import re
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import pandas as pd
+
+DEFAULT_CATEGORY = 'Other'
+
+# Tokens carrying digits are card numbers, dates, or reference IDs
+_DIGIT_TOKEN = r"\b\w*\d\w*\b"
+# Whatever punctuation is left behind once those tokens are gone
+_PUNCT_TOKEN = r"(?<!\S)[^\w\s]+(?!\S)"
+_DIGIT_TOKEN_RE = re.compile(_DIGIT_TOKEN)
+_PUNCT_TOKEN_RE = re.compile(_PUNCT_TOKEN)
+_SPACES_RE = re.compile(r"\s+")
+
+
+def normalize_merchant(description) -> str:
+    """
+    Reduces a raw description to a stable merchant key,
+    e.g. 'TESCO STORES 3021 12/03/24' -> 'tesco stores'.
+    """
+    text = _DIGIT_TOKEN_RE.sub(" ", str(description).lower())
+    text = _PUNCT_TOKEN_RE.sub(" ", text)
+    return _SPACES_RE.sub(" ", text).strip()
+
+
+def normalize_merchants(descriptions: pd.Series) -> pd.Series:
+    """
+    Vectorized normalize_merchant over a whole column.
+    """
+    return (descriptions.astype(str).str.lower()
+            .str.replace(_DIGIT_TOKEN, " ", regex=True)
+            .str.replace(_PUNCT_TOKEN, " ", regex=True)
+            .str.replace(r"\s+", " ", regex=True)
+            .str.strip())
+
+
+def rules_key(categories: Dict[str, List[str]]) -> Tuple:
+    """
+    Hashable snapshot of a category rule set, used to notice edits.
+    """
+    return tuple((cat, tuple(patterns)) for cat, patterns in categories.items())
+
+
+def rules_version(key: Tuple) -> str:
+    """
+    Short stable digest of a rules_key, for persisting alongside cached results.
+    """
+    return hashlib.sha1(repr(key).encode()).hexdigest()[:16]
+
+
+class CategoryMatcher:
+    """
+    Compiles every category rule into a single regex.
+
+    Each category becomes an anchored lookahead that searches the whole
+    description for any of its patterns, followed by an empty marker group.
+    The alternatives are tried in dictionary order, so the first category
+    with any matching pattern wins - the same result as looping over the
+    categories and calling re.search for each pattern.
+    """
+
+    def __init__(self, categories: Dict[str, List[str]]):
+        self.key = rules_key(categories)
+        self._markers: Dict[str, str] = {}
+        branches = []
+        for i, (cat, patterns) in enumerate(categories.items()):
+            if not patterns:
+                continue
+            marker = f"_cat{i}"
+            self._markers[marker] = cat
+            alternation = "|".join(f"(?:{p})" for p in patterns)
+            branches.append(f"(?=(?s:.*?)(?:{alternation}))(?P<{marker}>)")
+        self.regex = re.compile("|".join(branches)) if branches else None
+
+    def categorize(self, description) -> str:
+        if self.regex is None:
+            return DEFAULT_CATEGORY
+        match = self.regex.match(str(description).lower())
+        if match is None:
+            return DEFAULT_CATEGORY
+        return self._markers[match.lastgroup]
+
+    def categorize_series(self, descriptions: pd.Series) -> pd.Series:
+        """
+        Categorizes a whole Description column at once.
+
+        Descriptions are lowercased and de-duplicated first, so the regex
+        only runs once per distinct description.
+        """
+        if descriptions.empty or self.regex is None:
+            return pd.Series(DEFAULT_CATEGORY, index=descriptions.index)
+
+        codes, uniques = pd.factorize(descriptions.astype(str).str.lower())
+        extracted = pd.Series(uniques, dtype=object).str.extract(self.regex)
+        hits = extracted[list(self._markers)].notna()
+        unique_cats = hits.idxmax(axis=1).map(self._markers)
+        unique_cats[~hits.any(axis=1)] = DEFAULT_CATEGORY
+
+        result = unique_cats.to_numpy(dtype=object)[codes]
+        return pd.Series(result, index=descriptions.index)
+
+
+class MerchantCache:
+    """
+    Bounded LRU mapping of lowercased description -> category.
+
+    Entries remember the rule set they were computed with; when the rules
+    change, only entries that the edit could have affected are dropped.
+    Entries added since the last drain_new() are tracked so callers can
+    persist them incrementally.
+    """
+
+    def __init__(self, max_size: int = 50_000):
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, str]" = OrderedDict()
+        self._new: Dict[str, str] = {}
+        self._rules: Optional[Tuple] = None
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, merchant: str) -> Optional[str]:
+        category = self._entries.get(merchant)
+        if category is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(merchant)
+        self.hits += 1
+        return category
+
+    def put(self, merchant: str, category: str):
+        self._entries[merchant] = category
+        self._entries.move_to_end(merchant)
+        self._new[merchant] = category
+        while len(self._entries) > self.max_size:
+            evicted, _ = self._entries.popitem(last=False)
+            self._new.pop(evicted, None)
+
+    def load(self, entries: Iterable[Tuple[str, str]]):
+        """
+        Seeds the cache from persisted (merchant, category) pairs.
+        """
+        for merchant, category in entries:
+            self._entries[merchant] = category
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def drain_new(self) -> List[Tuple[str, str]]:
+        new = list(self._new.items())
+        self._new.clear()
+        return new
+
+    def sync_rules(self, key: Tuple):
+        """
+        Invalidates entries affected by a change from the previous rules.
+
+        Categories are tried in order, so a cached result is still valid if
+        its category sits before the first rule that changed.
+        """
+        if self._rules == key:
+            return
+        if self._rules is not None:
+            first_changed = next(
+                (i for i, (old, new) in enumerate(zip(self._rules, key)) if old != new),
+                min(len(self._rules), len(key)),
+            )
+            still_valid = {cat for cat, _ in key[:first_changed]}
+            for merchant in [m for m, c in self._entries.items() if c not in still_valid]:
+                del self._entries[merchant]
+            # Survivors are re-persisted under the new rules version
+            self._new = dict(self._entries)
+        self._rules = key
+
+    def stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
@@ -0,0 +1,244 @@
+"""
+Headless batch processing of bank statements, e.g. from cron:
+
+    python cli.py statements/2024-*.csv statements/*.pdf --json summary.json
+
+Statements are parsed in parallel worker processes, saved to the SQLite
+ledger and analysed together. Per-file timings go to stderr.
+"""
+import argparse
+import csv
+import glob
+import json
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import instrumentation
+from database import DatabaseManager
+from engine import FinanceEngine
+
+STATEMENT_EXTENSIONS = ('.csv', '.pdf')
+
+# One parser per worker process, created by _init_worker
+_parser = None
+
+
+@dataclass
+class FileResult:
+    path: str
+    rows: int = 0
+    new_rows: int = 0
+    parse_seconds: float = 0.0
+    error: Optional[str] = None
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.parse_seconds if self.parse_seconds else 0.0
+
+    def to_dict(self) -> Dict:
+        return dict(asdict(self), rows_per_second=self.rows_per_second)
+
+
+def expand_paths(patterns: List[str]) -> List[str]:
+    """
+    Resolves files, directories (their CSV/PDF statements) and glob
+    patterns, keeping the first occurrence of each path.
+    """
+    paths = []
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            paths.extend(sorted(os.path.join(pattern, name) for name in os.listdir(pattern)
+                                if name.lower().endswith(STATEMENT_EXTENSIONS)))
+        elif glob.has_magic(pattern):
+            paths.extend(sorted(p for p in glob.glob(pattern, recursive=True) if os.path.isfile(p)))
+        else:
+            paths.append(pattern)
+    return list(dict.fromkeys(paths))
+
+
+def _init_worker(cache_dir: Optional[str], merchant_entries: List, format_entries: List, instrument: bool):
+    global _parser
+    from parser import StatementParser
+    instrumentation.enable(instrument)
+    _parser = StatementParser(cache_dir=cache_dir)
+    _parser.merchant_cache.load(merchant_entries)
+    _parser.formats.load(format_entries)
+
+
+def _process_file(path: str):
+    """
+    Parses one statement and prepares its ledger rows and spending cube,
+    in a worker process, so the parent only has to insert and merge. The
+    transactions come back as a compact TransactionStore, which is also
+    much cheaper to send between processes than a DataFrame.
+    """
+    from reports import spending_cube
+
+    start = time.perf_counter()
+    store = _parser.parse_transactions(path)
+    ledger_rows = _parser.to_ledger_rows(store)
+    cube = spending_cube(store)
+    return (store, ledger_rows, cube, _parser.merchant_cache.drain_new(), _parser.formats.drain_new(),
+            instrumentation.drain(), time.perf_counter() - start)
+
+
+def _parse_all(paths: List[str], workers: int, cache_dir: Optional[str], merchant_entries: List,
+               format_entries: List):
+    """
+    Yields (path, result or exception) as each statement finishes.
+    """
+    if workers <= 1 or len(paths) == 1:
+        _init_worker(cache_dir, merchant_entries, format_entries, instrumentation.enabled())
+        for path in paths:
+            try:
+                yield path, _process_file(path)
+            except Exception as e:
+                yield path, e
+        return
+
+    # spawn, as for PDF page extraction: forking a process with live SQLite handles isn't safe
+    with ProcessPoolExecutor(max_workers=min(workers, len(paths)), mp_context=multiprocessing.get_context('spawn'),
+                             initializer=_init_worker, initargs=(cache_dir, merchant_entries, format_entries, instrumentation.enabled())) as pool:
+        futures = {pool.submit(_process_file, path): path for path in paths}
+        for future in as_completed(futures):
+            try:
+                yield futures[future], future.result()
+            except Exception as e:
+                yield futures[future], e
+
+
+def process_statements(paths: List[str], db_path: str = "finflow.db", workers: int = 1,
+                       cache_dir: Optional[str] = None, report_dir: Optional[str] = None,
+                       log=None) -> Dict:
+    """
+    Parses every statement, bulk-loads new transactions into the ledger and
+    runs the engine's analyses over all of them together. Returns a
+    JSON-serializable summary.
+    """
+    from parser import SpendingTotals, StatementParser
+
+    started = time.perf_counter()
+    db = DatabaseManager(db_path)
+    try:
+        rules_version = StatementParser().rules_version
+        merchant_entries = db.load_merchant_categories(rules_version)
+        format_entries = db.load_bank_formats()
+
+        results, stores, totals = [], [], SpendingTotals()
+        for path, outcome in _parse_all(paths, workers, cache_dir, merchant_entries, format_entries):
+            if isinstance(outcome, Exception):
+                result = FileResult(path, error=str(outcome))
+            else:
+                store, ledger_rows, cube, new_merchants, new_formats, spans, seconds = outcome
+                instrumentation.merge(spans)
+                result = FileResult(path, rows=len(store), new_rows=db.import_transactions(ledger_rows),
+                                    parse_seconds=seconds)
+                db.save_merchant_categories(new_merchants, rules_version)
+                db.save_bank_formats(new_formats)
+                if not store.empty:
+                    stores.append(store)
+                    totals.merge(cube, len(store))
+            results.append(result)
+            if log:
+                log(result)
+
+        engine = FinanceEngine(db.load_profile())
+        analysis = {"suggestions": [], "recurring": []}
+        # One statement at a time: fingerprints are per statement, which lets the
+        # engine skip rows repeated across overlapping statements, like the ledger does
+        for store in stores:
+            analysis = engine.analyze_spending(store)
+        if report_dir and totals.rows:
+            totals.report().export(report_dir)
+
+        order = {path: i for i, path in enumerate(paths)}
+        rows = sum(r.rows for r in results)
+        elapsed = time.perf_counter() - started
+        return {
+            "files": [r.to_dict() for r in sorted(results, key=lambda r: order[r.path])],
+            "totals": {
+                "files": len(results),
+                "failed": sum(1 for r in results if r.error),
+                "rows": rows,
+                "new_rows": sum(r.new_rows for r in results),
+                "workers": workers,
+                "seconds": elapsed,
+                "rows_per_second": rows / elapsed if elapsed else 0.0,
+            },
+            "insights": totals.insights(),
+            "recurring": [asdict(c) for c in analysis["recurring"]],
+            "suggestions": analysis["suggestions"],
+            "split": engine.split_money(datetime.now()),
+        }
+    finally:
+        db.close()
+
+
+def write_csv_summary(summary: Dict, path: str):
+    """
+    One row of throughput stats per statement.
+    """
+    fields = ['path', 'rows', 'new_rows', 'parse_seconds', 'rows_per_second', 'error']
+    with open(path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=fields)
+        writer.writeheader()
+        writer.writerows(summary["files"])
+
+
+def _log_result(result: FileResult):
+    if result.error:
+        print(f"FAILED {result.path}: {result.error}", file=sys.stderr)
+    else:
+        print(f"{result.path}: {result.rows} rows ({result.new_rows} new) in {result.parse_seconds:.2f}s, "
+              f"{result.rows_per_second:,.0f} rows/s", file=sys.stderr)
+
+
+def main(argv=None) -> int:
+    args = argparse.ArgumentParser(description="Parse, store and analyse bank statements without the TUI.")
+    args.add_argument("paths", nargs="+", help="statement files, directories or glob patterns")
+    args.add_argument("--db", default="finflow.db", help="SQLite database to load into")
+    args.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="parser processes")
+    args.add_argument("--cache-dir", default=".finflow_cache", help="parsed-statement cache ('' to disable)")
+    args.add_argument("--json", dest="json_path", help="write the full summary as JSON ('-' for stdout)")
+    args.add_argument("--csv", dest="csv_path", help="write per-file throughput stats as CSV")
+    args.add_argument("--report-dir", help="export the combined spending report here")
+    args.add_argument("--instrument", dest="instrument_path",
+                      help="record timing spans and counters and write them here as JSON")
+    args.add_argument("--cprofile", dest="cprofile_path",
+                      help="write cProfile stats of the run here (worker processes aren't profiled; use --workers 1)")
+    options = args.parse_args(argv)
+
+    paths = expand_paths(options.paths)
+    if not paths:
+        print("No statements matched.", file=sys.stderr)
+        return 1
+
+    if options.instrument_path:
+        instrumentation.enable()
+    with instrumentation.profile_to(options.cprofile_path):
+        summary = process_statements(paths, options.db, options.workers, options.cache_dir or None,
+                                     options.report_dir, log=_log_result)
+    if options.instrument_path:
+        instrumentation.dump_json(options.instrument_path)
+    totals = summary["totals"]
+    print(f"{totals['files']} files, {totals['rows']} rows ({totals['new_rows']} new) in {totals['seconds']:.2f}s "
+          f"with {totals['workers']} workers, {totals['rows_per_second']:,.0f} rows/s", file=sys.stderr)
+
+    if options.json_path == "-":
+        json.dump(summary, sys.stdout, indent=4, default=str)
+    elif options.json_path:
+        with open(options.json_path, "w") as f:
+            json.dump(summary, f, indent=4, default=str)
+    if options.csv_path:
+        write_csv_summary(summary, options.csv_path)
+    return 1 if totals["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,16 +1,112 @@
 import sqlite3
 import json
+import queue
+import threading
+from contextlib import contextmanager
 from datetime import datetime
+from typing import Iterable, List, Optional, Tuple
 from engine import FinanceProfile, IncomeSource, Expense, BudgetStrategy
+from instrumentation import count, timed
+
+# Bump whenever the DDL in DatabaseManager._init_db changes
+SCHEMA_VERSION = 3
+
+# Columns added to existing tables after they were first created, by table
+ADDED_COLUMNS = {
+    "profile_settings": {"payoff_method": "TEXT DEFAULT 'avalanche'", "payoff_order": "TEXT DEFAULT '[]'"},
+    "expenses": {"balance": "REAL DEFAULT 0", "apr": "REAL DEFAULT 0"},
+}
+
+# Columns returned by query_transactions, in order
+TRANSACTION_COLUMNS = ('date', 'description', 'merchant', 'amount', 'category')
+
+CONNECTION_PRAGMAS = [
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA cache_size=-65536",
+    "PRAGMA mmap_size=268435456",
+    "PRAGMA temp_store=MEMORY",
+]
+
+class ConnectionPool:
+    """
+    Long-lived SQLite connections shared across threads.
+
+    All writes go through one writer connection guarded by a lock; reads
+    borrow a connection from a small pool, which WAL lets run alongside
+    the writer. Each connection keeps its own prepared statement cache.
+    """
+
+    def __init__(self, db_path: str, readers: int = 4):
+        self.db_path = db_path
+        self._write_lock = threading.Lock()
+        self._writer = self._connect()
+        self._readers: "queue.Queue[sqlite3.Connection]" = queue.Queue()
+        self._all_readers: List[sqlite3.Connection] = []
+        self._max_readers = readers
+        # Every ':memory:' connection is a separate database, so share the writer
+        self._shared = db_path == ":memory:"
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, check_same_thread=False, cached_statements=256)
+        for pragma in CONNECTION_PRAGMAS:
+            conn.execute(pragma)
+        return conn
+
+    @contextmanager
+    def writer(self):
+        """
+        Yields the writer connection; commits on success, rolls back on error.
+        """
+        with self._write_lock:
+            try:
+                yield self._writer
+                self._writer.commit()
+            except Exception:
+                self._writer.rollback()
+                raise
+
+    @contextmanager
+    def reader(self):
+        if self._shared:
+            with self._write_lock:
+                yield self._writer
+            return
+
+        try:
+            conn = self._readers.get_nowait()
+        except queue.Empty:
+            if len(self._all_readers) < self._max_readers:
+                conn = self._connect()
+                self._all_readers.append(conn)
+            else:
+                conn = self._readers.get()
+        try:
+            yield conn
+        finally:
+            self._readers.put(conn)
+
+    def close(self):
+        for conn in self._all_readers:
+            conn.close()
+        self._all_readers.clear()
+        self._writer.close()
 
 class DatabaseManager:
     def __init__(self, db_path: str = "finflow.db"):
         self.db_path = db_path
+        self._pool = ConnectionPool(db_path)
         self._init_db()
 
+    def close(self):
+        self._pool.close()
+
     def _init_db(self):
-        with sqlite3.connect(self.db_path) as conn:
+        with self._pool.writer() as conn:
             cursor = conn.cursor()
+            cursor.execute("PRAGMA user_version")
+            if cursor.fetchone()[0] == SCHEMA_VERSION:
+                return
             # Profile settings table
             cursor.execute("""
                 CREATE TABLE IF NOT EXISTS profile_settings (
@@ -41,62 +137,260 @@ class DatabaseManager:
                     is_debt BOOLEAN
                 )
             """)
+            # Description -> category cache (keys are lowercased descriptions), tagged with the rule set
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS merchant_categories (
+                    merchant TEXT PRIMARY KEY,
+                    category TEXT,
+                    rules_version TEXT
+                )
+            """)
+            # Resolved bank statement layouts (bank_formats.BankFormat as JSON) by header fingerprint
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS bank_formats (
+                    fingerprint TEXT PRIMARY KEY,
+                    format TEXT
+                )
+            """)
+            # Transaction ledger; fingerprint dedupes rows across overlapping statements
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS transactions (
+                    fingerprint INTEGER PRIMARY KEY,
+                    date TEXT,
+                    description TEXT,
+                    merchant TEXT,
+                    amount REAL,
+                    category TEXT
+                )
+            """)
+            # CREATE TABLE IF NOT EXISTS leaves older tables as they were
+            for table, columns in ADDED_COLUMNS.items():
+                cursor.execute(f"PRAGMA table_info({table})")
+                existing = {row[1] for row in cursor.fetchall()}
+                for column, declaration in columns.items():
+                    if column not in existing:
+                        cursor.execute(f"ALTER TABLE {table} ADD COLUMN {column} {declaration}")
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_transactions_date ON transactions (date)")
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_transactions_category_date ON transactions (category, date)")
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_transactions_merchant ON transactions (merchant)")
             # Check if profile exists, if not create default
             cursor.execute("SELECT COUNT(*) FROM profile_settings")
             if cursor.fetchone()[0] == 0:
                 cursor.execute("INSERT INTO profile_settings (balance, savings_goal, target_strategy) VALUES (?, ?, ?)",
                                (0.0, 0.0, "Balanced"))
-            conn.commit()
+            cursor.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
 
+    @timed("db.load_profile")
     def load_profile(self) -> FinanceProfile:
         profile = FinanceProfile()
-        with sqlite3.connect(self.db_path) as conn:
+        with self._pool.reader() as conn:
             cursor = conn.cursor()
             
             # Load settings
-            cursor.execute("SELECT balance, savings_goal, target_strategy FROM profile_settings WHERE id = 1")
+            cursor.execute("""
+                SELECT balance, savings_goal, target_strategy, payoff_method, payoff_order
+                FROM profile_settings WHERE id = 1
+            """)
             row = cursor.fetchone()
             if row:
                 profile.balance = row[0]
                 profile.savings_goal = row[1]
                 profile.target_strategy = BudgetStrategy(row[2])
+                profile.payoff_method = row[3]
+                profile.payoff_order = json.loads(row[4])
 
             # Load income sources
-            cursor.execute("SELECT name, amount, pay_days FROM income_sources")
-            for name, amount, pay_days_str in cursor.fetchall():
+            cursor.execute("SELECT id, name, amount, pay_days FROM income_sources")
+            for row_id, name, amount, pay_days_str in cursor.fetchall():
                 pay_days = [int(d) for d in pay_days_str.split(',')]
-                profile.income_sources.append(IncomeSource(name, amount, pay_days))
+                profile.income_sources.append(IncomeSource(name, amount, pay_days, id=row_id))
 
             # Load expenses
-            cursor.execute("SELECT name, amount, due_day, category, priority, is_debt FROM expenses")
-            for name, amount, due_day, category, priority, is_debt in cursor.fetchall():
-                profile.expenses.append(Expense(name, amount, due_day, category, priority, bool(is_debt)))
+            cursor.execute("SELECT id, name, amount, due_day, category, priority, is_debt, balance, apr FROM expenses")
+            for row_id, name, amount, due_day, category, priority, is_debt, balance, apr in cursor.fetchall():
+                profile.expenses.append(Expense(name, amount, due_day, category, priority, bool(is_debt),
+                                                balance, apr, id=row_id))
 
+        profile.mark_saved()
         return profile
 
+    @timed("db.save_profile")
     def save_profile(self, profile: FinanceProfile):
-        with sqlite3.connect(self.db_path) as conn:
+        """
+        Writes only what changed since the last load/save; a profile with no
+        changes doesn't touch the database at all.
+        """
+        if not profile.has_changes():
+            return
+
+        with self._pool.writer() as conn:
             cursor = conn.cursor()
             
             # Save settings
-            cursor.execute("""
-                UPDATE profile_settings 
-                SET balance = ?, savings_goal = ?, target_strategy = ?
-                WHERE id = 1
-            """, (profile.balance, profile.savings_goal, profile.target_strategy.value))
+            if profile.is_dirty:
+                cursor.execute("""
+                    UPDATE profile_settings 
+                    SET balance = ?, savings_goal = ?, target_strategy = ?, payoff_method = ?, payoff_order = ?
+                    WHERE id = 1
+                """, (profile.balance, profile.savings_goal, profile.target_strategy.value,
+                      profile.payoff_method, json.dumps(profile.payoff_order)))
 
-            # Save income (simple approach: clear and re-insert)
-            cursor.execute("DELETE FROM income_sources")
-            for source in profile.income_sources:
-                cursor.execute("INSERT INTO income_sources (name, amount, pay_days) VALUES (?, ?, ?)",
-                               (source.name, source.amount, ",".join(map(str, source.pay_days))))
+            # Save income
+            self._sync_rows(cursor, "income_sources", ["name", "amount", "pay_days"],
+                            profile.income_sources, profile._saved_income_ids,
+                            lambda s: (s.name, s.amount, ",".join(map(str, s.pay_days))))
 
             # Save expenses
-            cursor.execute("DELETE FROM expenses")
-            for exp in profile.expenses:
-                cursor.execute("""
-                    INSERT INTO expenses (name, amount, due_day, category, priority, is_debt)
-                    VALUES (?, ?, ?, ?, ?, ?)
-                """, (exp.name, exp.amount, exp.due_day, exp.category, exp.priority, exp.is_debt))
+            self._sync_rows(cursor, "expenses",
+                            ["name", "amount", "due_day", "category", "priority", "is_debt", "balance", "apr"],
+                            profile.expenses, profile._saved_expense_ids,
+                            lambda e: (e.name, e.amount, e.due_day, e.category, e.priority, e.is_debt,
+                                       e.balance, e.apr))
             
-            conn.commit()
+        profile.mark_saved()
+
+    def _sync_rows(self, cursor, table: str, columns: List[str], items, saved_ids, to_row):
+        """
+        Deletes rows whose items were removed, inserts new items and upserts
+        dirty ones. New items take the id SQLite assigns on insert, so a
+        concurrent writer can never be handed the same id.
+        """
+        removed = saved_ids - {item.id for item in items}
+        if removed:
+            cursor.executemany(f"DELETE FROM {table} WHERE id = ?", [(row_id,) for row_id in removed])
+
+        new_items = [item for item in items if item.id is None]
+        if new_items:
+            insert = f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})"
+            for item in new_items:
+                cursor.execute(insert, to_row(item))
+                item.id = cursor.lastrowid
+
+        new_ids = {id(item) for item in new_items}
+        changed = [item for item in items if item.is_dirty and id(item) not in new_ids]
+        if changed:
+            placeholders = ", ".join("?" * (len(columns) + 1))
+            updates = ", ".join(f"{col} = excluded.{col}" for col in columns)
+            cursor.executemany(f"""
+                INSERT INTO {table} (id, {", ".join(columns)}) VALUES ({placeholders})
+                ON CONFLICT(id) DO UPDATE SET {updates}
+            """, [(item.id,) + to_row(item) for item in changed])
+
+    def load_merchant_categories(self, rules_version: str) -> List[Tuple[str, str]]:
+        """
+        Returns cached (merchant, category) pairs computed with the given rules.
+        """
+        with self._pool.reader() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT merchant, category FROM merchant_categories WHERE rules_version = ?",
+                           (rules_version,))
+            return cursor.fetchall()
+
+    def save_merchant_categories(self, entries: List[Tuple[str, str]], rules_version: str):
+        """
+        Upserts cached merchant categories and drops entries from older rule sets.
+        """
+        with self._pool.writer() as conn:
+            cursor = conn.cursor()
+            cursor.execute("DELETE FROM merchant_categories WHERE rules_version != ?", (rules_version,))
+            cursor.executemany("""
+                INSERT OR REPLACE INTO merchant_categories (merchant, category, rules_version)
+                VALUES (?, ?, ?)
+            """, [(merchant, category, rules_version) for merchant, category in entries])
+
+    def load_bank_formats(self) -> List[Tuple[str, str]]:
+        """
+        Returns the (fingerprint, format JSON) pairs of every known bank layout.
+        """
+        with self._pool.reader() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT fingerprint, format FROM bank_formats")
+            return cursor.fetchall()
+
+    def save_bank_formats(self, entries: List[Tuple[str, str]]):
+        if not entries:
+            return
+        with self._pool.writer() as conn:
+            conn.executemany("INSERT OR REPLACE INTO bank_formats (fingerprint, format) VALUES (?, ?)", entries)
+
+    @timed("db.import_transactions")
+    def import_transactions(self, rows: Iterable[Tuple]) -> int:
+        """
+        Bulk-inserts (fingerprint, date, description, merchant, amount, category)
+        rows in a single transaction, skipping fingerprints already in the ledger.
+        Returns the number of new rows.
+        """
+        with self._pool.writer() as conn:
+            before = conn.total_changes
+            conn.executemany("""
+                INSERT OR IGNORE INTO transactions (fingerprint, date, description, merchant, amount, category)
+                VALUES (?, ?, ?, ?, ?, ?)
+            """, rows)
+            count("db.rows_imported", conn.total_changes - before)
+            return conn.total_changes - before
+
+    @timed("db.query_transactions")
+    def query_transactions(self, start_date: Optional[str] = None, end_date: Optional[str] = None,
+                           category: Optional[str] = None, limit: Optional[int] = None, offset: int = 0,
+                           order_by: str = 'date', descending: bool = False) -> List[Tuple]:
+        """
+        Returns (date, description, merchant, amount, category) rows ordered by
+        `order_by` (any of those columns). Dates are ISO 'YYYY-MM-DD' strings
+        and both bounds are inclusive. limit/offset page through the result.
+        """
+        if order_by not in TRANSACTION_COLUMNS:
+            raise ValueError(f"Cannot order transactions by {order_by!r}")
+        where, params = self._transaction_filters(start_date, end_date, category)
+
+        # Fingerprint breaks ties so pages don't overlap
+        sql = (f"SELECT {', '.join(TRANSACTION_COLUMNS)} FROM transactions{where} "
+               f"ORDER BY {order_by}{' DESC' if descending else ''}, fingerprint")
+        if limit is not None or offset:
+            sql += " LIMIT ? OFFSET ?"
+            params += [-1 if limit is None else limit, offset]
+
+        with self._pool.reader() as conn:
+            return conn.execute(sql, params).fetchall()
+
+    def count_transactions(self, start_date: Optional[str] = None, end_date: Optional[str] = None,
+                           category: Optional[str] = None) -> int:
+        where, params = self._transaction_filters(start_date, end_date, category)
+        with self._pool.reader() as conn:
+            return conn.execute(f"SELECT COUNT(*) FROM transactions{where}", params).fetchone()[0]
+
+    @timed("db.spending_cube")
+    def spending_cube(self, start_date: Optional[str] = None, end_date: Optional[str] = None) -> List[Tuple]:
+        """
+        (category, month, merchant, total, spent, count) rows grouped in a
+        single query, for reports.InsightsReport. Months are 'YYYY-MM'; the
+        category is None for rows saved without one.
+        """
+        where, params = self._transaction_filters(start_date, end_date, None)
+        with self._pool.reader() as conn:
+            return conn.execute(f"""
+                SELECT category, COALESCE(substr(date, 1, 7), ''), COALESCE(merchant, ''),
+                       TOTAL(amount), TOTAL(CASE WHEN amount < 0 THEN -amount ELSE 0 END), COUNT(*)
+                FROM transactions{where}
+                GROUP BY 1, 2, 3
+            """, params).fetchall()
+
+    def ledger_version(self) -> int:
+        """
+        Changes whenever the ledger does. Transactions are only ever added
+        (duplicates are ignored), so the row count is enough.
+        """
+        return self.count_transactions()
+
+    def _transaction_filters(self, start_date: Optional[str], end_date: Optional[str],
+                             category: Optional[str]) -> Tuple[str, list]:
+        clauses, params = [], []
+        if category is not None:
+            clauses.append("category = ?")
+            params.append(category)
+        if start_date is not None:
+            clauses.append("date >= ?")
+            params.append(start_date)
+        if end_date is not None:
+            clauses.append("date <= ?")
+            params.append(end_date)
+        return (" WHERE " + " AND ".join(clauses) if clauses else ""), params
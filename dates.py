@@ -0,0 +1,75 @@
+from datetime import datetime
+from typing import Iterable, Optional
+
+import pandas as pd
+
+# Layouts tried by detect_date_format, in order; day-first comes before
+# month-first because statements are UK
+DATE_FORMATS = [
+    '%d/%m/%Y', '%d/%m/%y', '%Y-%m-%d', '%d-%m-%Y', '%d-%m-%y', '%d.%m.%Y',
+    '%d %b %Y', '%d %b %y', '%d-%b-%Y', '%d-%b-%y', '%d %B %Y', '%Y/%m/%d', '%m/%d/%Y',
+]
+
+
+def detect_date_format(samples: Iterable) -> Optional[str]:
+    """
+    The first of DATE_FORMATS that parses every sample, or None if none
+    does (dates are then inferred per value). Samples no format can parse,
+    like 'pending', don't count against any.
+    """
+    values = [str(s).strip() for s in samples if isinstance(s, str) and s.strip()]
+    parses_any = {}
+    for date_format in DATE_FORMATS:
+        parsed = 0
+        for value in values:
+            if _parses(value, date_format):
+                parsed += 1
+                continue
+            if value not in parses_any:
+                parses_any[value] = any(_parses(value, f) for f in DATE_FORMATS)
+            if parses_any[value]:
+                break
+        else:
+            if parsed:
+                return date_format
+    return None
+
+
+def _parses(value: str, date_format: str) -> bool:
+    try:
+        datetime.strptime(value, date_format)
+    except ValueError:
+        return False
+    return True
+
+
+def parse_statement_dates(dates: pd.Series, date_format: Optional[str] = None) -> pd.Series:
+    """
+    Parses statement date strings (UK day-first) to datetime64, NaT if unparseable.
+
+    Statements repeat a handful of dates, so each distinct string is parsed
+    once. With a known `date_format` the parse skips format inference;
+    values it doesn't fit (the format is detected from a sample) are
+    inferred instead of dropped.
+    """
+    if pd.api.types.is_datetime64_any_dtype(dates):
+        return dates
+    codes, uniques = pd.factorize(dates.astype(str))
+    uniques = pd.Series(uniques, dtype=object)
+    if date_format:
+        parsed = pd.to_datetime(uniques, format=date_format, errors='coerce')
+        missed = parsed.isna()
+        if missed.any():
+            parsed[missed] = _infer_dates(uniques[missed])
+    else:
+        parsed = _infer_dates(uniques)
+    return pd.Series(parsed.to_numpy()[codes], index=dates.index)
+
+
+def _infer_dates(values: pd.Series) -> pd.Series:
+    # ISO dates first: dayfirst would read 2024-01-03 as the 1st of March
+    parsed = pd.to_datetime(values, format='ISO8601', errors='coerce').astype('datetime64[us]')
+    rest = parsed.isna()
+    if rest.any():
+        parsed[rest] = pd.to_datetime(values[rest], format='mixed', dayfirst=True, errors='coerce')
+    return parsed
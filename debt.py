@@ -0,0 +1,185 @@
+from dataclasses import dataclass
+from typing import Dict, List, Sequence
+
+import numpy as np
+
+from engine import PAYOFF_METHODS
+
+# Plans are simulated for up to 30 years
+MAX_MONTHS = 360
+# A balance under half a penny counts as cleared
+PAID_OFF = 0.005
+
+
+def debt_accounts(expenses) -> List:
+    """
+    The expenses that are debts with an outstanding balance.
+    """
+    return [e for e in expenses if e.is_debt and e.balance > 0]
+
+
+def payoff_order(debts, method: str, custom_order: Sequence[str] = ()) -> np.ndarray:
+    """
+    Indices of `debts` in the order extra payments go to them.
+
+    avalanche: highest APR first, smaller balance breaking ties.
+    snowball: smallest balance first, higher APR breaking ties.
+    custom: the debts named in custom_order, in that order, then the rest
+    by avalanche.
+    """
+    balances = np.array([d.balance for d in debts], dtype=np.float64)
+    aprs = np.array([d.apr for d in debts], dtype=np.float64)
+    avalanche = np.lexsort((balances, -aprs))
+    if method == 'avalanche':
+        return avalanche
+    if method == 'snowball':
+        return np.lexsort((-aprs, balances))
+    if method == 'custom':
+        rank = {name: i for i, name in enumerate(custom_order)}
+        named = sorted((i for i, d in enumerate(debts) if d.name in rank), key=lambda i: rank[debts[i].name])
+        rest = [i for i in avalanche.tolist() if debts[i].name not in rank]
+        return np.array(named + rest, dtype=np.intp)
+    raise ValueError(f"Unknown payoff method {method!r}, expected one of {PAYOFF_METHODS}")
+
+
+def extra_capacity(debts) -> float:
+    """
+    The most an extra payment can put towards the debts next month: what
+    is left of each balance after a month's interest and its minimum.
+    """
+    owed = np.array([d.balance * (1 + d.apr / 1200) for d in debts], dtype=np.float64)
+    minimums = np.array([d.amount for d in debts], dtype=np.float64)
+    return float(np.sum(owed - np.minimum(owed, minimums)))
+
+
+@dataclass
+class PayoffPlans:
+    """
+    Simulated payoff plans, one row per (method, extra payment) pair, held
+    as columns. Per-debt arrays have a column per entry of `debts`.
+    """
+    debts: List[str]
+    method: np.ndarray
+    extra: np.ndarray
+    order: np.ndarray           # (plans, debts): debt indices, first to get extra payments first
+    months: np.ndarray          # until debt-free, -1 if not within the horizon
+    total_interest: np.ndarray
+    total_paid: np.ndarray
+    payoff_month: np.ndarray    # (plans, debts): month each debt is cleared, -1 if never
+    next_payment: np.ndarray    # (plans, debts): next month's payment, minimum included
+    next_extra: np.ndarray      # (plans, debts): the part of it above the minimum
+
+    def __len__(self):
+        return len(self.method)
+
+    def best(self) -> int:
+        """
+        The plan paying the least interest among those that clear every
+        debt, soonest first on ties; the shortest plan if none do.
+        """
+        unfinished = self.months < 0
+        return int(np.lexsort((self.months, self.total_interest, unfinished))[0])
+
+    def next_payments(self, plan: int) -> Dict[str, float]:
+        return {name: float(amount) for name, amount in zip(self.debts, self.next_payment[plan]) if amount > 0}
+
+    def next_targets(self, plan: int) -> List[str]:
+        """
+        The debts next month's extra payment goes to, in payoff order.
+        """
+        return [self.debts[i] for i in self.order[plan] if self.next_extra[plan, i] > 0]
+
+    def rows(self) -> List[Dict]:
+        return [
+            {
+                "method": self.method[i],
+                "extra": float(self.extra[i]),
+                "months": int(self.months[i]),
+                "total_interest": float(self.total_interest[i]),
+                "total_paid": float(self.total_paid[i]),
+                "next_payments": self.next_payments(i),
+            }
+            for i in range(len(self))
+        ]
+
+
+def simulate_payoff(balances: np.ndarray, monthly_rates: np.ndarray, minimums: np.ndarray,
+                    orders: np.ndarray, extras: np.ndarray, months: int = MAX_MONTHS) -> Dict[str, np.ndarray]:
+    """
+    Amortizes every plan month by month, all plans and debts at once.
+
+    Plans are rows: orders (plans, debts) gives each plan's payoff priority
+    and extras (plans,) what it pays on top of the minimums. Every month
+    interest is added, each debt gets its minimum (or what's left of the
+    balance), and the rest of the plan's budget goes to debts in priority
+    order. The budget stays fixed, so minimums freed by a cleared debt roll
+    on to the next one. Stops once every plan is debt-free or after
+    `months` months.
+    """
+    plans, count = orders.shape
+    balance = np.broadcast_to(balances, (plans, count)).astype(np.float64)
+    budget = minimums.sum() + extras
+    rows = np.arange(plans)[:, None]
+
+    total_interest = np.zeros(plans)
+    total_paid = np.zeros(plans)
+    payoff_month = np.where(balance > PAID_OFF, -1, 0).astype(np.int32)
+    next_payment = next_extra = np.zeros((plans, count))
+    for month in range(1, months + 1):
+        interest = balance * monthly_rates
+        balance += interest
+        total_interest += interest.sum(axis=1)
+
+        minimum = np.minimum(balance, minimums)
+        left = budget - minimum.sum(axis=1)
+        # Extra money fills the remaining balances in priority order
+        owed = balance[rows, orders] - minimum[rows, orders]
+        before = np.cumsum(owed, axis=1) - owed
+        extra = np.zeros((plans, count))
+        extra[rows, orders] = np.clip(left[:, None] - before, 0.0, owed)
+
+        payment = minimum + extra
+        balance -= payment
+        total_paid += payment.sum(axis=1)
+        if month == 1:
+            next_payment, next_extra = payment, extra
+
+        cleared = balance <= PAID_OFF
+        payoff_month[cleared & (payoff_month < 0)] = month
+        balance[cleared] = 0.0
+        if cleared.all():
+            break
+
+    finished = (payoff_month >= 0).all(axis=1)
+    return {
+        "months": np.where(finished, payoff_month.max(axis=1, initial=0), -1),
+        "total_interest": total_interest,
+        "total_paid": total_paid,
+        "payoff_month": payoff_month,
+        "next_payment": next_payment,
+        "next_extra": next_extra,
+    }
+
+
+def plan_payoff(debts, extras: Sequence[float], methods: Sequence[str] = PAYOFF_METHODS,
+                custom_order: Sequence[str] = (), months: int = MAX_MONTHS) -> PayoffPlans:
+    """
+    Simulates every payoff method at every monthly extra payment in
+    `extras`. Debts are engine.Expense items with a balance and an APR
+    (percent); their amount is the monthly minimum.
+    """
+    extras = np.asarray(extras, dtype=np.float64)
+    orders = np.stack([payoff_order(debts, m, custom_order) for m in methods]) if debts else \
+        np.zeros((len(methods), 0), dtype=np.intp)
+
+    # Every (method, extra) pair is one plan
+    method_idx = np.repeat(np.arange(len(methods)), len(extras))
+    extra_idx = np.tile(np.arange(len(extras)), len(methods))
+    result = simulate_payoff(
+        np.array([d.balance for d in debts], dtype=np.float64),
+        np.array([d.apr / 1200 for d in debts], dtype=np.float64),
+        np.array([d.amount for d in debts], dtype=np.float64),
+        orders[method_idx], extras[extra_idx], months,
+    )
+    return PayoffPlans(debts=[d.name for d in debts], method=np.array(methods, dtype=object)[method_idx],
+                       extra=extras[extra_idx], order=orders[method_idx], **result)
@@ -5,6 +5,8 @@ from typing import List, Dict, Optional
 
 from enum import Enum
 
+from instrumentation import timed
+
 class BudgetStrategy(Enum):
     BALANCED = "Balanced"
     AGGRESSIVE_DEBT = "Aggressive Debt"
@@ -13,29 +15,91 @@ class BudgetStrategy(Enum):
     SAFE_SAVINGS = "Safe Savings"
     FIRE = "FIRE (Extreme Frugality)"
 
+# Share of safe-to-spend moved to (extra debt payment, savings, buffer) per strategy
+STRATEGY_SPLITS = {
+    BudgetStrategy.BALANCED: (0.0, 0.0, 0.2),
+    BudgetStrategy.AGGRESSIVE_DEBT: (0.7, 0.0, 0.0),
+    BudgetStrategy.AGGRESSIVE_SAVINGS: (0.0, 0.7, 0.0),
+    BudgetStrategy.SAFE_DEBT: (0.3, 0.0, 0.0),
+    BudgetStrategy.SAFE_SAVINGS: (0.0, 0.3, 0.0),
+    BudgetStrategy.FIRE: (0.0, 0.9, 0.0),
+}
+
+# Orders for paying off debts: highest APR first, smallest balance first, or the profile's own order
+PAYOFF_METHODS = ('avalanche', 'snowball', 'custom')
+
+class DirtyTracked:
+    """
+    Marks an instance dirty whenever one of its public attributes is assigned.
+
+    In-place mutation (e.g. appending to pay_days) is not seen; assign a new
+    value instead. The row id is bookkeeping and doesn't count as a change.
+    """
+
+    def __setattr__(self, name, value):
+        object.__setattr__(self, name, value)
+        if not name.startswith('_') and name != 'id':
+            object.__setattr__(self, '_dirty', True)
+
+    @property
+    def is_dirty(self) -> bool:
+        return getattr(self, '_dirty', True)
+
+    def mark_clean(self):
+        object.__setattr__(self, '_dirty', False)
+
 @dataclass
-class IncomeSource:
+class IncomeSource(DirtyTracked):
     name: str
     amount: float
     pay_days: List[int]
     recurring: bool = True
+    id: Optional[int] = field(default=None, compare=False)
 
 @dataclass
-class Expense:
+class Expense(DirtyTracked):
     name: str
     amount: float
     due_day: int
     category: str
     priority: int = 1
     is_debt: bool = False
+    balance: float = 0.0   # outstanding, for debts; amount is then the monthly minimum
+    apr: float = 0.0       # annual interest rate in percent
+    id: Optional[int] = field(default=None, compare=False)
 
 @dataclass
-class FinanceProfile:
+class FinanceProfile(DirtyTracked):
     income_sources: List[IncomeSource] = field(default_factory=list)
     expenses: List[Expense] = field(default_factory=list)
     balance: float = 0.0
     savings_goal: float = 0.0
     target_strategy: BudgetStrategy = BudgetStrategy.BALANCED
+    payoff_method: str = "avalanche"   # one of PAYOFF_METHODS
+    payoff_order: List[str] = field(default_factory=list)  # debt names, for the custom method
+
+    def __post_init__(self):
+        # Row ids as of the last load/save, to spot deletions
+        self._saved_income_ids = set()
+        self._saved_expense_ids = set()
+
+    def mark_saved(self):
+        """
+        Records the current state as persisted.
+        """
+        for item in self.income_sources + self.expenses:
+            item.mark_clean()
+        self._saved_income_ids = {i.id for i in self.income_sources}
+        self._saved_expense_ids = {e.id for e in self.expenses}
+        self.mark_clean()
+
+    def has_changes(self) -> bool:
+        return (
+            self.is_dirty
+            or any(item.is_dirty or item.id is None for item in self.income_sources + self.expenses)
+            or self._saved_income_ids != {i.id for i in self.income_sources}
+            or self._saved_expense_ids != {e.id for e in self.expenses}
+        )
 
     def to_json(self):
         data = asdict(self)
@@ -51,6 +115,8 @@ class FinanceProfile:
         profile.balance = obj.get('balance', 0.0)
         profile.savings_goal = obj.get('savings_goal', 0.0)
         profile.target_strategy = BudgetStrategy(obj.get('target_strategy', "Balanced"))
+        profile.payoff_method = obj.get('payoff_method', "avalanche")
+        profile.payoff_order = obj.get('payoff_order', [])
         return profile
 
     def save_to_file(self, file_path: str = "profile.json"):
@@ -68,98 +134,166 @@ class FinanceProfile:
 class FinanceEngine:
     def __init__(self, profile: FinanceProfile):
         self.profile = profile
+        self.recurring = None
+        self.forecaster = None
+        # Ledger fingerprints of the transactions already analysed, sorted
+        self._analysed = None
 
+    @timed("engine.split_money")
     def split_money(self, current_date: datetime):
         """
         Determines how to split the current balance based on upcoming bills,
         next paydays, and the selected strategy.
         """
-        today = current_date.day
-        current_month = current_date.month
-        current_year = current_date.year
-
-        # 1. Identify all upcoming paydays across all sources
-        all_paydays = []
-        for source in self.profile.income_sources:
-            for day in source.pay_days:
-                all_paydays.append(day)
-        all_paydays = sorted(list(set(all_paydays)))
-
-        # Find the NEXT payday
-        next_payday = next((d for d in all_paydays if d > today), all_paydays[0] if all_paydays else today)
-        
+        # Imported lazily so the engine itself has no NumPy dependency
+        from projection import CashFlowProjector, add_months
+
+        projector = CashFlowProjector(self.profile)
+        today = current_date.date() if isinstance(current_date, datetime) else current_date
+
+        # 1. Find the NEXT payday across all income sources
+        payday = projector.next_payday(today)
+        if payday is None:
+            # No income configured: look a full month ahead
+            next_payday = today.day
+            window_end = add_months(today, 1).item()
+        else:
+            next_payday = payday.day
+            window_end = payday
+
         # 2. Identify bills due before the NEXT payday
-        bills_due = []
-        critical_total = 0.0
-        debt_total = 0.0
-        
-        for expense in self.profile.expenses:
-            # Simple logic: if due_day > today and due_day <= next_payday (or if next_payday is earlier than today, meaning next month)
-            is_upcoming = False
-            if next_payday > today:
-                if today < expense.due_day <= next_payday:
-                    is_upcoming = True
-            else: # Next payday is next month
-                if expense.due_day > today or expense.due_day <= next_payday:
-                    is_upcoming = True
-            
-            if is_upcoming:
-                bills_due.append(expense)
-                if expense.priority == 1:
-                    critical_total += expense.amount
-                if expense.is_debt:
-                    debt_total += expense.amount
+        bills_due = projector.bills_due(today, window_end)
+        critical_total = sum(e.amount for e in bills_due if e.priority == 1)
+        debt_total = sum(e.amount for e in bills_due if e.is_debt)
+        variable_reserve = self.variable_reserve(today, window_end)
 
         # 3. Strategy-based logic
         strategy = self.profile.target_strategy
-        safe_to_spend = self.profile.balance - critical_total
+        safe_to_spend = self.profile.balance - critical_total - variable_reserve
         
-        extra_debt_payment = 0.0
-        savings_contribution = 0.0
-
-        if strategy == BudgetStrategy.AGGRESSIVE_DEBT:
-            extra_debt_payment = max(0, safe_to_spend * 0.7)
-            safe_to_spend -= extra_debt_payment
-        elif strategy == BudgetStrategy.AGGRESSIVE_SAVINGS:
-            savings_contribution = max(0, safe_to_spend * 0.7)
-            safe_to_spend -= savings_contribution
-        elif strategy == BudgetStrategy.FIRE:
-            savings_contribution = max(0, safe_to_spend * 0.9)
-            safe_to_spend -= savings_contribution
-        elif strategy == BudgetStrategy.SAFE_DEBT:
-            extra_debt_payment = max(0, safe_to_spend * 0.3)
-            safe_to_spend -= extra_debt_payment
-        elif strategy == BudgetStrategy.SAFE_SAVINGS:
-            savings_contribution = max(0, safe_to_spend * 0.3)
-            safe_to_spend -= savings_contribution
+        debt_rate, savings_rate, buffer_rate = STRATEGY_SPLITS[strategy]
+        extra_debt_payment = max(0.0, safe_to_spend * debt_rate)
+        # Debt latch: the extra follows the payoff plan, capped at what the debts can still take
+        payoff = self.plan_debt_payoff([extra_debt_payment], [self.profile.payoff_method])
+        if payoff is not None:
+            extra_debt_payment = float(payoff.next_extra[0].sum())
+        savings_contribution = max(0.0, safe_to_spend * savings_rate)
+        safe_to_spend -= extra_debt_payment + savings_contribution
         
         # Buffer for 'Balanced'
-        if strategy == BudgetStrategy.BALANCED:
-            buffer = safe_to_spend * 0.2
-            safe_to_spend -= buffer
+        buffer = safe_to_spend * buffer_rate
+        safe_to_spend -= buffer
 
         return {
             "current_balance": self.profile.balance,
             "next_payday": next_payday,
             "bills_upcoming": [asdict(b) for b in bills_due],
             "critical_total": critical_total,
+            "variable_reserve": variable_reserve,
             "extra_debt_payment": extra_debt_payment,
+            "debt_payments": payoff.next_payments(0) if payoff is not None else {},
+            "debt_free_months": int(payoff.months[0]) if payoff is not None else None,
             "savings_contribution": savings_contribution,
             "safe_to_spend": max(0, safe_to_spend)
         }
 
+    def plan_debt_payoff(self, extras=(0.0,), methods=None):
+        """
+        Simulates paying off the profile's debts (is_debt expenses with a
+        balance) with each method and each monthly extra payment, all in one
+        vectorized pass. Returns a debt.PayoffPlans, or None without debts.
+        """
+        from debt import debt_accounts, plan_payoff
+
+        debts = debt_accounts(self.profile.expenses)
+        if not debts:
+            return None
+        if methods is None:
+            # Without an order of its own, custom is just avalanche
+            methods = [m for m in PAYOFF_METHODS if m != 'custom' or self.profile.payoff_order]
+        return plan_payoff(debts, extras, methods, self.profile.payoff_order)
+
+    def variable_reserve(self, today, until) -> float:
+        """
+        Forecast day-to-day spending between today and `until`, prorated
+        from the monthly forecast. Zero until a statement has been analysed.
+        """
+        if self.forecaster is None:
+            return 0.0
+        return self.forecaster.variable_spend() * (until - today).days / 30.44
+
+    def project_cash_flow(self, current_date: datetime, months: int = 12):
+        """
+        Simulates the balance day by day for the next `months` months.
+        Returns a projection.CashFlowProjection.
+        """
+        from projection import CashFlowProjector
+
+        today = current_date.date() if isinstance(current_date, datetime) else current_date
+        return CashFlowProjector(self.profile).project(today, months)
+
+    @timed("engine.compare_strategies")
+    def compare_strategies(self, current_date: datetime, balance_deltas=(0.0,), income_deltas=(0.0,),
+                           months: int = 1):
+        """
+        Evaluates every strategy over a grid of what-if scenarios in one
+        vectorized pass. Returns a scenarios.StrategyComparison.
+        """
+        from scenarios import evaluate_strategies
+
+        today = current_date.date() if isinstance(current_date, datetime) else current_date
+        return evaluate_strategies(self.profile, today, balance_deltas, income_deltas, months,
+                                   reserve=lambda until: self.variable_reserve(today, until))
+
+    @timed("engine.analyze_spending")
     def analyze_spending(self, df_statement):
         """
-        Analyze a pandas DataFrame of bank transactions.
+        Analyze bank transactions, as a pandas DataFrame or a
+        transactions.TransactionStore.
+
+        Statements are fed to a recurring-charge detector and a spending
+        forecaster that persist on the engine, so analysing another
+        statement only folds in the new rows. Transactions already analysed
+        (by ledger fingerprint) are skipped, so re-analysing a statement or
+        one that overlaps an earlier one doesn't count them twice.
         """
-        # Basic example categorizer
-        summary = df_statement.groupby('category')['amount'].sum().to_dict()
-        suggestions = []
-        
-        # Identify recurring high-cost items
-        # ... logic to follow
+        import numpy as np
+        from forecast import SpendingForecaster
+        from recurring import RecurringDetector
+        from transactions import TransactionStore
+
+        # Dates are parsed and merchants normalized once here, not by each analysis.
+        # Accepts the parser's 'Category'/'Amount' columns and lowercase ones.
+        statement = TransactionStore.coerce(df_statement)
+        totals = np.bincount(statement.category_codes, weights=np.nan_to_num(statement.amounts),
+                             minlength=len(statement.categories))
+        summary = dict(sorted(zip(statement.categories.tolist(), totals.tolist())))
+
+        fingerprints = statement.fingerprints()
+        if self._analysed is None:
+            fresh = statement
+            self._analysed = np.unique(fingerprints)
+        else:
+            is_new = ~np.isin(fingerprints, self._analysed)
+            fresh = statement if is_new.all() else statement.take(is_new)
+            self._analysed = np.union1d(self._analysed, fingerprints)
+
+        if self.recurring is None:
+            self.recurring = RecurringDetector(self.profile.expenses)
+        self.recurring.update(fresh)
+        if self.forecaster is None:
+            self.forecaster = SpendingForecaster()
+        self.forecaster.update(fresh)
+
+        # Identify recurring charges that aren't budgeted for
+        suggestions = [
+            f"'{charge.merchant}' charges £{charge.average_amount:.2f} {charge.period} but isn't in your "
+            f"expenses - cancel it or add it as an expense."
+            for charge in self.recurring.orphans()
+        ]
         
         return {
             "summary": summary,
-            "suggestions": suggestions
+            "suggestions": suggestions,
+            "recurring": self.recurring.recurring()
         }
@@ -0,0 +1,99 @@
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from transactions import TransactionStore
+
+# Categories normally covered by the profile's Expense list, left out of the
+# variable-spend reserve so they aren't counted twice
+FIXED_CATEGORIES = ('Bills/Utilities', 'Subscriptions')
+
+
+class SpendingForecaster:
+    """
+    Per-category monthly spending forecasts from parsed statements.
+
+    Spending is kept as a dense category x month matrix of totals. update()
+    only groups the new rows and adds them into the matrix, so history is
+    never re-aggregated. Forecasts for every category are fitted at once:
+    EWMA is a single matrix-vector product with the decay weights, and
+    seasonal naive reads the column twelve months back.
+    """
+
+    def __init__(self, alpha: float = 0.3, model: str = 'ewma',
+                 fixed_categories: Sequence[str] = FIXED_CATEGORIES):
+        if model not in ('ewma', 'seasonal_naive'):
+            raise ValueError(f"Unknown forecast model: {model}")
+        self.alpha = alpha
+        self.model = model
+        self.fixed_categories = set(fixed_categories)
+        self.categories: List[str] = []
+        self.totals = np.zeros((0, 0))
+        self.first_month: Optional[int] = None  # months since year 0
+        self.last_date: Optional[pd.Timestamp] = None
+        self._forecast: Optional[np.ndarray] = None
+
+    def update(self, statement):
+        """
+        Folds a statement's spending (negative amounts) into the aggregates.
+        Takes a TransactionStore or a parsed statement DataFrame.
+        """
+        store = TransactionStore.coerce(statement)
+        months = store.month_numbers()
+        mask = (months >= 0) & (store.amounts < 0)
+        if not mask.any():
+            return
+
+        months = months[mask]
+        codes = store.category_codes[mask]
+        self._grow(store.categories[np.unique(codes)], months.min(), months.max())
+        rows = pd.Index(self.categories).get_indexer(store.categories)[codes]
+        cols = months - self.first_month
+        width = self.totals.shape[1]
+        self.totals += np.bincount(rows * width + cols, weights=-store.amounts[mask],
+                                   minlength=self.totals.size).reshape(self.totals.shape)
+
+        newest = pd.Timestamp(store.dates[mask].max())
+        self.last_date = newest if self.last_date is None else max(self.last_date, newest)
+        self._forecast = None
+
+    def _grow(self, categories, first_month: int, last_month: int):
+        new = [c for c in categories if c not in self.categories]
+        self.categories.extend(new)
+        if self.first_month is None:
+            self.first_month = first_month
+            self.totals = np.zeros((len(self.categories), last_month - first_month + 1))
+            return
+        before = max(0, self.first_month - first_month)
+        after = max(0, last_month - (self.first_month + self.totals.shape[1] - 1))
+        self.totals = np.pad(self.totals, ((0, len(new)), (before, after)))
+        self.first_month -= before
+
+    def _complete_months(self) -> np.ndarray:
+        # A month whose last day isn't in the data yet would drag forecasts down
+        if self.last_date is not None and not self.last_date.is_month_end:
+            return self.totals[:, :-1]
+        return self.totals
+
+    def forecast(self) -> Dict[str, float]:
+        """
+        Expected spend per category for the next month.
+        """
+        if self._forecast is None:
+            history = self._complete_months()
+            if history.shape[1] == 0:
+                self._forecast = np.zeros(len(self.categories))
+            elif self.model == 'seasonal_naive' and history.shape[1] >= 12:
+                self._forecast = history[:, -12]
+            else:
+                # Most recent month gets weight alpha, the one before alpha*(1-alpha), ...
+                weights = self.alpha * (1 - self.alpha) ** np.arange(history.shape[1])[::-1]
+                self._forecast = history @ weights / weights.sum()
+        return dict(zip(self.categories, self._forecast.tolist()))
+
+    def variable_spend(self) -> float:
+        """
+        Expected monthly spend across categories not already budgeted as expenses.
+        """
+        return sum(amount for cat, amount in self.forecast().items() if cat not in self.fixed_categories)
@@ -0,0 +1,124 @@
+import hashlib
+import os
+import tempfile
+from contextlib import suppress
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+
+class ImportCache:
+    """
+    On-disk cache of parsed statements keyed by file content and parser version.
+
+    Each entry is a single .npz file. Numeric and date columns are stored
+    as-is and text columns are dictionary-encoded (int32 codes plus the
+    distinct values), which keeps repetitive statement data small and fast
+    to load.
+    The least recently used entries are evicted once the directory grows
+    past max_bytes. Several processes (e.g. CLI workers) may share the
+    directory, so any entry can disappear under us at any point.
+    """
+
+    def __init__(self, cache_dir: str, max_bytes: int = 256 * 1024 * 1024):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def digest(self, file_path: str, version: str) -> str:
+        sha = hashlib.sha256()
+        with open(file_path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                sha.update(block)
+        sha.update(version.encode())
+        return sha.hexdigest()
+
+    def _entry_path(self, digest: str) -> str:
+        return os.path.join(self.cache_dir, f"{digest}.npz")
+
+    def get(self, digest: str) -> Optional[pd.DataFrame]:
+        path = self._entry_path(digest)
+        if not os.path.exists(path):
+            return None
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                # A digest mismatch means a corrupt or foreign entry
+                if str(data["digest"]) != digest:
+                    raise ValueError("digest mismatch")
+                df = _decode_frame(data)
+        except Exception:
+            with suppress(FileNotFoundError):
+                os.remove(path)
+            return None
+        with suppress(FileNotFoundError):
+            os.utime(path)
+        return df
+
+    def put(self, digest: str, df: pd.DataFrame):
+        path = self._entry_path(digest)
+        try:
+            arrays = _encode_frame(df)
+        except (TypeError, ValueError):
+            # Frames we can't encode compactly are simply not cached
+            return
+        # A private temp file per writer: two workers parsing identical files write the same entry
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                np.savez(f, digest=np.array(digest), **arrays)
+            os.replace(tmp_path, path)
+        except BaseException:
+            with suppress(FileNotFoundError):
+                os.remove(tmp_path)
+            raise
+        self._evict()
+
+    def _evict(self):
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if name.endswith(".npz"):
+                with suppress(FileNotFoundError):
+                    stat = os.stat(os.path.join(self.cache_dir, name))
+                    entries.append((stat.st_mtime, stat.st_size, name))
+        total = sum(size for _, size, _ in entries)
+        for _, size, name in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            with suppress(FileNotFoundError):
+                os.remove(os.path.join(self.cache_dir, name))
+            total -= size
+
+
+def _encode_frame(df: pd.DataFrame) -> dict:
+    arrays = {
+        "columns": np.array([str(c) for c in df.columns]),
+        "index": df.index.to_numpy(dtype=np.int64),
+    }
+    for i, col in enumerate(df.columns):
+        series = df[col]
+        if pd.api.types.is_datetime64_any_dtype(series):
+            arrays[f"dates_{i}"] = series.to_numpy(dtype="datetime64[ns]")
+        elif pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series):
+            arrays[f"num_{i}"] = series.to_numpy()
+        else:
+            codes, uniques = pd.factorize(series.astype(object))
+            arrays[f"codes_{i}"] = codes.astype(np.int32)
+            arrays[f"uniques_{i}"] = np.array([str(u) for u in uniques], dtype=str)
+    return arrays
+
+
+def _decode_frame(data) -> pd.DataFrame:
+    index = pd.Index(data["index"])
+    columns = {}
+    for i, col in enumerate(data["columns"].tolist()):
+        if f"dates_{i}" in data:
+            columns[col] = pd.Series(data[f"dates_{i}"], index=index)
+        elif f"num_{i}" in data:
+            columns[col] = pd.Series(data[f"num_{i}"], index=index)
+        else:
+            codes = data[f"codes_{i}"]
+            values = data[f"uniques_{i}"].astype(object)[codes]
+            values[codes < 0] = None
+            columns[col] = pd.Series(values, index=index)
+    return pd.DataFrame(columns, index=index)
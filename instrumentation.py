@@ -0,0 +1,179 @@
+"""
+Opt-in timing spans and counters for the hot paths (parsing, the
+database, the engine and the TUI), plus cProfile capture.
+
+Everything is off by default: a disabled span is a shared no-op context
+and a disabled timed() wrapper costs one flag check. Set FINFLOW_INSTRUMENT=1
+(or true/yes/on) or call enable() to start collecting.
+"""
+import json
+import os
+import threading
+from contextlib import contextmanager, nullcontext
+from functools import wraps
+from time import perf_counter
+from typing import Dict, Iterator, Optional
+
+_enabled = os.environ.get("FINFLOW_INSTRUMENT", "").strip().lower() in ("1", "true", "yes", "on")
+_lock = threading.Lock()
+# name -> [calls, total seconds, max seconds, last seconds]
+_spans: Dict[str, list] = {}
+_counters: Dict[str, int] = {}
+_DISABLED = nullcontext()
+
+
+def enabled() -> bool:
+    return _enabled
+
+
+def enable(on: bool = True):
+    global _enabled
+    _enabled = on
+
+
+def reset():
+    with _lock:
+        _spans.clear()
+        _counters.clear()
+
+
+def _record(name: str, seconds: float, calls: int = 1, longest: Optional[float] = None):
+    with _lock:
+        stats = _spans.get(name)
+        if stats is None:
+            _spans[name] = [calls, seconds, seconds if longest is None else longest, seconds]
+        else:
+            stats[0] += calls
+            stats[1] += seconds
+            stats[2] = max(stats[2], seconds if longest is None else longest)
+            stats[3] = seconds
+
+
+class _Span:
+    __slots__ = ("name", "start")
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __enter__(self):
+        self.start = perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        _record(self.name, perf_counter() - self.start)
+
+
+def span(name: str):
+    """
+    Times a block: `with span("parser.read"): ...`
+    """
+    return _Span(name) if _enabled else _DISABLED
+
+
+def timed(name: str):
+    """
+    Decorator recording each call of the function as a span.
+    """
+    def decorate(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return fn(*args, **kwargs)
+            start = perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                _record(name, perf_counter() - start)
+        return wrapper
+    return decorate
+
+
+def count(name: str, n: int = 1):
+    if _enabled:
+        with _lock:
+            _counters[name] = _counters.get(name, 0) + n
+
+
+def snapshot() -> Dict:
+    """
+    Span and counter totals so far, JSON-serializable. Span times are in
+    milliseconds.
+    """
+    with _lock:
+        return _snapshot()
+
+
+def drain() -> Dict:
+    """
+    snapshot() and reset() in one step, e.g. to ship a worker process's
+    totals to the parent for merge().
+    """
+    with _lock:
+        data = _snapshot()
+        _spans.clear()
+        _counters.clear()
+    return data
+
+
+def _snapshot() -> Dict:
+    spans = {
+        name: {
+            "calls": calls,
+            "total_ms": total * 1000,
+            "mean_ms": total * 1000 / calls,
+            "max_ms": longest * 1000,
+            "last_ms": last * 1000,
+        }
+        for name, (calls, total, longest, last) in sorted(_spans.items(), key=lambda kv: -kv[1][1])
+    }
+    return {"enabled": _enabled, "spans": spans, "counters": dict(sorted(_counters.items()))}
+
+
+def merge(data: Dict):
+    """
+    Adds totals from another process's snapshot.
+    """
+    for name, stats in data["spans"].items():
+        _record(name, stats["total_ms"] / 1000, stats["calls"], stats["max_ms"] / 1000)
+    with _lock:
+        for name, n in data["counters"].items():
+            _counters[name] = _counters.get(name, 0) + n
+
+
+def dump_json(path: str) -> str:
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(snapshot(), f, indent=4)
+    return path
+
+
+@contextmanager
+def profile_to(path: Optional[str]) -> Iterator:
+    """
+    Runs the block under cProfile and writes the stats to path (readable
+    with pstats or snakeviz). Only the calling thread is profiled. With no
+    path this does nothing.
+    """
+    if not path:
+        yield None
+        return
+    import cProfile
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield profiler
+    finally:
+        profiler.disable()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        profiler.dump_stats(path)
+
+
+def profile_summary(path: str, limit: int = 15) -> str:
+    """
+    The `limit` most expensive functions of a saved profile, by cumulative time.
+    """
+    import io
+    import pstats
+    out = io.StringIO()
+    pstats.Stats(path, stream=out).sort_stats("cumulative").print_stats(limit)
+    return out.getvalue()
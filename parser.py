@@ -1,10 +1,44 @@
+import numpy as np
 import pandas as pd
 import re
 import pdfplumber
-from typing import List, Dict
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from bank_formats import FORMAT_SAMPLE_ROWS, BankFormat, FormatRegistry
+from categorizer import CategoryMatcher, MerchantCache, rules_key, rules_version
+from import_cache import ImportCache
+from instrumentation import count, timed
+from reports import CUBE_COLUMNS, TOP_MERCHANTS, InsightsReport, merge_cubes, spending_cube
+from transactions import TransactionStore
+
+# PDFs shorter than this are always extracted serially
+MIN_PARALLEL_PAGES = 16
+
+# Bump whenever parsing/standardization output changes, to invalidate cached imports
+PARSER_VERSION = 4
+
+
+def _extract_page_range(file_path: str, start: int, stop: Optional[int]) -> List[Tuple[int, Optional[list], float]]:
+    """
+    Extracts the first table of each page in [start, stop).
+
+    Lives at module level so process pool workers can run it; each call
+    opens its own handle on the PDF.
+    """
+    pages = []
+    with pdfplumber.open(file_path) as pdf:
+        for page_no in range(start, len(pdf.pages) if stop is None else stop):
+            began = time.perf_counter()
+            table = pdf.pages[page_no].extract_table()
+            pages.append((page_no, table, time.perf_counter() - began))
+    return pages
+
 
 class StatementParser:
-    def __init__(self):
+    def __init__(self, cache_size: int = 50_000, cache_dir: Optional[str] = None):
         # ... categories stay the same ...
         # Default keywords for categorization
         self.categories = {
@@ -16,73 +50,234 @@ class StatementParser:
             'Shopping': [r'amazon', r'ebay', r'argos', r'boots', r'ikea'],
             'Entertainment': [r'steam', r'playstation', r'xbox', r'cinema', r'pub', r'bar']
         }
+        self._matcher = None
+        self.merchant_cache = MerchantCache(cache_size)
+        self.formats = FormatRegistry()
+        self.last_page_timings: List[Tuple[int, float]] = []
+        self.import_cache = ImportCache(cache_dir) if cache_dir else None
 
-    def parse_pdf(self, file_path: str) -> pd.DataFrame:
+    @timed("parser.parse_pdf")
+    def parse_pdf(self, file_path: str, workers: int = 1) -> pd.DataFrame:
         """
         Extracts table data from a PDF statement.
+
+        With workers > 1 pages are extracted in parallel processes; the
+        result is identical to the serial path. Per-page extraction times
+        are left in self.last_page_timings.
         """
-        all_data = []
         try:
-            with pdfplumber.open(file_path) as pdf:
-                for page in pdf.pages:
-                    table = page.extract_table()
-                    if table:
-                        all_data.extend(table)
-            
-            if not all_data:
-                return pd.DataFrame()
+            digest, cached = self._cache_lookup(file_path)
+            if cached is not None:
+                return cached
 
-            # Attempt to find headers and clean data
-            df = pd.DataFrame(all_data[1:], columns=all_data[0])
-            return self._standardize_df(df)
+            chunks = list(self.iter_pdf(file_path, workers))
+            if not chunks:
+                return pd.DataFrame()
+            return self._cache_store(digest, pd.concat(chunks) if len(chunks) > 1 else chunks[0])
         except Exception as e:
             print(f"Error parsing PDF: {e}")
             return pd.DataFrame()
 
-    def parse_csv(self, file_path: str) -> pd.DataFrame:
+    def iter_pdf(self, file_path: str, workers: int = 1, pages_per_chunk: int = 8,
+                 progress: Optional[Callable[[int, int], None]] = None) -> Iterator[pd.DataFrame]:
+        """
+        Streams a PDF statement as standardized chunks of a few pages each,
+        in page order. The header row comes from the first table and is
+        dropped where continuation pages repeat it. progress, if given, is
+        called with (pages_done, total_pages) after every chunk.
+        """
+        with pdfplumber.open(file_path) as pdf:
+            page_count = len(pdf.pages)
+        if page_count < MIN_PARALLEL_PAGES:
+            # Starting worker processes costs more than it saves on short statements
+            workers = 1
+        if workers > 1:
+            # A few ranges per worker keeps the pool busy when pages vary in cost
+            pages_per_chunk = min(pages_per_chunk, max(1, -(-page_count // (workers * 4))))
+        ranges = [(start, min(start + pages_per_chunk, page_count)) for start in range(0, page_count, pages_per_chunk)]
+
+        self.last_page_timings = []
+        header = fmt = None
+        offset = 0
+        for pages in self._extract_ranges(file_path, ranges, workers):
+            self.last_page_timings.extend((page_no, elapsed) for page_no, _, elapsed in pages)
+            count("parser.pdf_pages", len(pages))
+            rows = []
+            for _, table, _ in pages:
+                if not table:
+                    continue
+                if header is None or table[0] == header:
+                    header = table[0]
+                    table = table[1:]
+                rows.extend(table)
+            if progress:
+                progress(pages[-1][0] + 1 if pages else page_count, page_count)
+            if not rows:
+                continue
+
+            df = pd.DataFrame(rows, columns=header, index=range(offset, offset + len(rows)))
+            offset += len(rows)
+            if fmt is None:
+                # Resolved from the first rows, then kept for the rest of the statement
+                fmt = self.formats.resolve(header, lambda: df)
+            if fmt is None:
+                # Unrecognised layout: stop rather than extract the remaining pages
+                return
+            chunk = self._standardize_chunk(df, fmt)
+            if not chunk.empty:
+                yield chunk
+
+    def _extract_ranges(self, file_path: str, ranges: List[Tuple[int, int]],
+                        workers: int) -> Iterator[List[Tuple[int, Optional[list], float]]]:
+        if workers <= 1:
+            for start, stop in ranges:
+                yield _extract_page_range(file_path, start, stop)
+            return
+
+        # Spawned rather than forked workers are safe to start from a threaded host like the TUI
+        pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+        try:
+            futures = [pool.submit(_extract_page_range, file_path, start, stop) for start, stop in ranges]
+            # Results are taken in submission order, which is page order
+            for future in futures:
+                yield future.result()
+        finally:
+            # Closing the generator early (e.g. a cancelled import) drops the pages not yet started
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    def iter_statement(self, file_path: str, workers: int = 1,
+                       progress: Optional[Callable[[int, int], None]] = None) -> Iterator[pd.DataFrame]:
+        """
+        Streams a CSV or PDF statement as standardized chunks.
+
+        A cached import comes back as a single chunk; otherwise a fully
+        read statement is added to the import cache.
+        """
+        digest, cached = self._cache_lookup(file_path)
+        if cached is not None:
+            yield cached
+            return
+
+        if file_path.lower().endswith('.pdf'):
+            chunks = self.iter_pdf(file_path, workers, progress=progress)
+        else:
+            chunks = self.iter_csv(file_path)
+        collected = []
+        for chunk in chunks:
+            if digest is not None:
+                collected.append(chunk)
+            yield chunk
+        if collected:
+            self._cache_store(digest, pd.concat(collected))
+
+    @timed("parser.parse_csv")
+    def parse_csv(self, file_path: str, chunksize: int = 100_000) -> pd.DataFrame:
         try:
-            df = pd.read_csv(file_path)
-            return self._standardize_df(df)
+            digest, cached = self._cache_lookup(file_path)
+            if cached is not None:
+                return cached
+
+            chunks = list(self.iter_csv(file_path, chunksize))
+            if not chunks:
+                return pd.DataFrame()
+            return self._cache_store(digest, pd.concat(chunks) if len(chunks) > 1 else chunks[0])
         except Exception as e:
             print(f"Error parsing CSV: {e}")
             return pd.DataFrame()
 
+    def _cache_lookup(self, file_path: str) -> Tuple[Optional[str], Optional[pd.DataFrame]]:
+        if self.import_cache is None:
+            return None, None
+        digest = self.import_cache.digest(file_path, f"{PARSER_VERSION}:{self.rules_version}")
+        return digest, self.import_cache.get(digest)
+
+    def _cache_store(self, digest: Optional[str], df: pd.DataFrame) -> pd.DataFrame:
+        if digest is not None and not df.empty:
+            self.import_cache.put(digest, df)
+        return df
+
+    def iter_csv(self, file_path: str, chunksize: int = 100_000) -> Iterator[pd.DataFrame]:
+        """
+        Streams a CSV statement as standardized, categorized chunks.
+
+        The bank format is looked up by header (a new layout is detected
+        from a sample of rows) and only its mapped columns are read, with
+        explicit dtypes, so memory stays bounded by the chunk size.
+        """
+        header = pd.read_csv(file_path, nrows=0).columns
+        fmt = self.formats.resolve(header, lambda: pd.read_csv(file_path, nrows=FORMAT_SAMPLE_ROWS, dtype=str))
+        if fmt is None:
+            return
+
+        for chunk in pd.read_csv(file_path, chunksize=chunksize, **fmt.read_csv_options()):
+            chunk = self._standardize_chunk(chunk, fmt)
+            if not chunk.empty:
+                yield chunk
+
+    def stream_csv_insights(self, file_path: str, chunksize: int = 100_000) -> Dict:
+        """
+        Same result as get_spending_insights(parse_csv(...)), without ever
+        holding the whole statement in memory.
+        """
+        totals = SpendingTotals()
+        for chunk in self.iter_csv(file_path, chunksize):
+            totals.update(chunk)
+        return totals.insights()
+
+    @timed("parser.standardize_df")
     def _standardize_df(self, df: pd.DataFrame) -> pd.DataFrame:
-        # Standardization logic
-        col_map = {
-            'Date': ['date', 'transaction date', 'posted date', 'when'],
-            'Description': ['description', 'narrow description', 'transaction', 'details', 'info'],
-            'Amount': ['amount', 'value', 'transaction amount', 'credit/debit', 'money']
-        }
-        
-        standardized_cols = {}
-        for target, alternatives in col_map.items():
-            for col in df.columns:
-                if col and str(col).lower() in alternatives:
-                    standardized_cols[col] = target
-                    break
-        
-        df = df.rename(columns=standardized_cols)
-        required = ['Date', 'Description', 'Amount']
-        
-        # Filter for required columns if they exist
-        existing = [col for col in required if col in df.columns]
-        if not existing:
+        fmt = self.formats.resolve(df.columns, lambda: df)
+        if fmt is None:
             return pd.DataFrame()
-            
-        df = df[existing]
-        
-        # Fill missing Amount/Date if possible or drop
-        df = df.dropna(subset=['Description'])
-        if 'Amount' in df.columns:
-            # Clean amount strings (remove currency symbols)
-            df['Amount'] = df['Amount'].replace(r'[£$,]', '', regex=True).astype(float, errors='ignore')
-        
-        if 'Description' in df.columns:
-            df['Category'] = df['Description'].apply(self._categorize)
-            
+        return self._standardize_chunk(df, fmt)
+
+    @timed("parser.standardize_chunk")
+    def _standardize_chunk(self, df: pd.DataFrame, fmt: BankFormat) -> pd.DataFrame:
+        df = fmt.standardize(df)
+        df['Category'] = self._categorize_series(df['Description'])
+        count("parser.rows", len(df))
         return df
 
+    def _get_matcher(self) -> CategoryMatcher:
+        # Rebuild the compiled matcher whenever self.categories has been edited
+        key = rules_key(self.categories)
+        if self._matcher is None or self._matcher.key != key:
+            self._matcher = CategoryMatcher(self.categories)
+        self.merchant_cache.sync_rules(key)
+        return self._matcher
+
+    @property
+    def rules_version(self) -> str:
+        return rules_version(rules_key(self.categories))
+
+    @timed("parser.categorize_series")
+    def _categorize_series(self, descriptions: pd.Series) -> pd.Series:
+        """
+        Categorizes a column by distinct description, consulting the merchant
+        cache first and only running the matcher on unseen descriptions.
+
+        Rules match the raw description, not the normalized merchant:
+        dropping reference tokens can change the match ('TESCO3021', or
+        'AMAZON 12 PRIME' becoming 'amazon prime'). The matcher lowercases
+        anyway, so the lowercased description is the cache key.
+        """
+        matcher = self._get_matcher()
+        cache = self.merchant_cache
+        codes, uniques = pd.factorize(descriptions.astype(str).str.lower())
+
+        categories = [cache.get(d) for d in uniques]
+        missing = [i for i, cat in enumerate(categories) if cat is None]
+        count("parser.merchants_matched", len(missing))
+        if missing:
+            fresh = matcher.categorize_series(pd.Series([uniques[i] for i in missing], dtype=object))
+            for i, cat in zip(missing, fresh):
+                categories[i] = cat
+                cache.put(uniques[i], cat)
+
+        result = np.array(categories, dtype=object)[codes]
+        return pd.Series(result, index=descriptions.index)
+
+    @timed("parser.categorize")
     def _categorize(self, description: str) -> str:
         description = str(description).lower()
         for cat, patterns in self.categories.items():
@@ -91,22 +286,89 @@ class StatementParser:
                     return cat
         return 'Other'
 
+    @timed("parser.to_ledger_rows")
+    def to_ledger_rows(self, statement) -> List[Tuple]:
+        """
+        Converts a parsed statement (DataFrame or TransactionStore) into rows
+        for DatabaseManager.import_transactions, keyed by
+        TransactionStore.fingerprints.
+        """
+        store = TransactionStore.coerce(statement)
+        if store.empty:
+            return []
+        dates = store.day_strings()
+        amounts = pd.Series(store.amounts)
+        fingerprints = store.fingerprints(dates)
+
+        # Sorted by fingerprint (the ledger's primary key) so inserts append to the B-tree
+        order = np.argsort(fingerprints, kind='stable')
+        return list(zip(
+            fingerprints[order].tolist(),
+            dates.astype(object).where(dates.notna(), None).to_numpy()[order].tolist(),
+            store.descriptions[store.description_codes[order]].tolist(),
+            store.merchants[store.merchant_codes[order]].tolist(),
+            amounts.astype(object).where(amounts.notna(), None).to_numpy()[order].tolist(),
+            store.categories[store.category_codes[order]].tolist(),
+        ))
+
+    @timed("parser.parse_transactions")
+    def parse_transactions(self, file_path: str, workers: int = 1) -> TransactionStore:
+        """
+        Parses a CSV or PDF statement into a compact TransactionStore,
+        converting chunk by chunk so the full DataFrame is never held.
+        """
+        return TransactionStore.concat([TransactionStore.from_frame(chunk)
+                                        for chunk in self.iter_statement(file_path, workers)])
+
     def get_spending_insights(self, df: pd.DataFrame) -> Dict:
         """
         Returns insights like total spent per category and potential savings.
         """
-        if df.empty:
-            return {}
-            
-        summary = df.groupby('Category')['Amount'].sum().to_dict()
-        
-        # Simple logic: Highlight categories where spending is high
-        # Or identify recurring small payments that add up
-        
-        insights = {
-            "summary": summary,
-            "total_spent": df['Amount'].sum(),
-            "highest_category": max(summary, key=summary.get) if summary else "None"
-        }
-        
-        return insights
+        return self.get_spending_report(df).insights()
+
+    def get_spending_report(self, df: pd.DataFrame) -> InsightsReport:
+        """
+        Per-category, per-month and per-merchant rollups of a parsed
+        statement, built in a single grouped pass.
+        """
+        totals = SpendingTotals()
+        totals.update(df)
+        return totals.report()
+
+
+class SpendingTotals:
+    """
+    Running spending rollups that can be folded chunk by chunk.
+
+    Each chunk is reduced to a reports.spending_cube and merged into the
+    running cube. The report is built from the cube on demand and kept
+    until the next update.
+    """
+
+    def __init__(self, top_n: int = TOP_MERCHANTS):
+        self.top_n = top_n
+        self.cube = pd.DataFrame(columns=CUBE_COLUMNS)
+        self.rows = 0
+        self.version = 0
+        self._report: Optional[InsightsReport] = None
+
+    def update(self, statement):
+        if not statement.empty:
+            self.merge(spending_cube(statement), len(statement))
+
+    def merge(self, cube: pd.DataFrame, rows: int):
+        """
+        Folds in a cube built elsewhere, e.g. in a worker process.
+        """
+        self.cube = merge_cubes([self.cube, cube])
+        self.rows += rows
+        self.version += 1
+        self._report = None
+
+    def report(self) -> InsightsReport:
+        if self._report is None:
+            self._report = InsightsReport.from_cube(self.cube, self.top_n)
+        return self._report
+
+    def insights(self) -> Dict:
+        return self.report().insights()
@@ -0,0 +1,145 @@
+from dataclasses import dataclass
+from datetime import date
+from typing import List, Optional, Sequence
+
+import numpy as np
+
+
+@dataclass
+class CashFlowProjection:
+    dates: np.ndarray          # datetime64[D], one entry per projected day
+    income: np.ndarray         # money in on each day
+    outgoings: np.ndarray      # money out on each day
+    balance: np.ndarray        # closing balance on each day
+    min_balance: float
+    min_balance_date: Optional[date]
+    overdraft_date: Optional[date]  # first day the balance goes negative
+
+    def to_dict(self):
+        return {
+            "dates": [str(d) for d in self.dates],
+            "balance": self.balance.tolist(),
+            "min_balance": self.min_balance,
+            "min_balance_date": self.min_balance_date,
+            "overdraft_date": self.overdraft_date,
+        }
+
+
+def calendar(days: np.ndarray):
+    """
+    Returns (day_of_month, days_in_month) arrays for datetime64[D] days.
+    """
+    months = days.astype('datetime64[M]')
+    month_start = months.astype('datetime64[D]')
+    day_of_month = (days - month_start).astype(np.int64) + 1
+    days_in_month = ((months + 1).astype('datetime64[D]') - month_start).astype(np.int64)
+    return day_of_month, days_in_month
+
+
+def add_months(start: date, months: int) -> np.datetime64:
+    """
+    Same day-of-month `months` later, clamped to the end of shorter months.
+    """
+    month = np.datetime64(start, 'M') + months
+    _, days_in_month = calendar(np.array([month.astype('datetime64[D]')]))
+    return month.astype('datetime64[D]') + (min(start.day, int(days_in_month[0])) - 1)
+
+
+def daily_totals(day_of_month: np.ndarray, days_in_month: np.ndarray,
+                 item_days: Sequence[int], item_amounts: Sequence[float]) -> np.ndarray:
+    """
+    Sums recurring monthly items onto each calendar day.
+
+    An item due on day d lands on min(d, days_in_month), so a 31st bill is
+    paid on the 28th/29th/30th in shorter months. Items are bucketed by
+    day of month once, so the cost is O(items + days).
+    """
+    if len(item_days) == 0:
+        return np.zeros(len(day_of_month))
+    by_day = np.bincount(np.clip(np.asarray(item_days, dtype=np.int64), 1, 31),
+                         weights=np.asarray(item_amounts, dtype=np.float64), minlength=32)
+    # on_or_after[k] = total of items due on day k or later
+    on_or_after = np.cumsum(by_day[::-1])[::-1]
+    return np.where(day_of_month == days_in_month, on_or_after[day_of_month], by_day[day_of_month])
+
+
+def next_due_dates(item_days: Sequence[int], after: date) -> np.ndarray:
+    """
+    The first date strictly after `after` on which each monthly item falls due.
+    """
+    item_days = np.clip(np.asarray(item_days, dtype=np.int64), 1, 31)
+    this_month = np.datetime64(after, 'M')
+    months = np.array([this_month, this_month + 1])
+    starts = months.astype('datetime64[D]')
+    _, lengths = calendar(starts)
+    # Candidate due date in this month and next month, clamped to month length
+    this_due = starts[0] + (np.minimum(item_days, lengths[0]) - 1)
+    next_due = starts[1] + (np.minimum(item_days, lengths[1]) - 1)
+    return np.where(this_due > np.datetime64(after, 'D'), this_due, next_due)
+
+
+class CashFlowProjector:
+    """
+    Simulates the balance day by day from the profile's income and expenses.
+    """
+
+    def __init__(self, profile):
+        self.profile = profile
+
+    def project(self, start: date, months: int = 12) -> CashFlowProjection:
+        """
+        Projects from the day after `start` to the same day `months` later.
+        Each income source pays its amount on every one of its pay days.
+        """
+        first = np.datetime64(start, 'D') + 1
+        days = np.arange(first, add_months(start, months) + 1, dtype='datetime64[D]')
+        day_of_month, days_in_month = calendar(days)
+
+        recurring = [s for s in self.profile.income_sources if s.recurring]
+        pay_days = [d for s in recurring for d in s.pay_days]
+        pay_amounts = [s.amount for s in recurring for _ in s.pay_days]
+        income = daily_totals(day_of_month, days_in_month, pay_days, pay_amounts)
+
+        # One-off income only lands on its first pay day
+        for source in self.profile.income_sources:
+            if not source.recurring and source.pay_days and len(days):
+                first_day = next_due_dates(source.pay_days, start).min()
+                if first_day <= days[-1]:
+                    income[int((first_day - first).astype(np.int64))] += source.amount
+
+        expenses = self.profile.expenses
+        outgoings = daily_totals(day_of_month, days_in_month,
+                                 [e.due_day for e in expenses], [e.amount for e in expenses])
+
+        balance = self.profile.balance + np.cumsum(income - outgoings)
+        if not len(balance):
+            return CashFlowProjection(days, income, outgoings, balance, self.profile.balance, None, None)
+
+        lowest = int(np.argmin(balance))
+        negative = np.flatnonzero(balance < 0)
+        return CashFlowProjection(
+            dates=days,
+            income=income,
+            outgoings=outgoings,
+            balance=balance,
+            min_balance=float(balance[lowest]),
+            min_balance_date=days[lowest].item(),
+            overdraft_date=days[negative[0]].item() if len(negative) else None,
+        )
+
+    def next_payday(self, today: date) -> Optional[date]:
+        pay_days = [d for s in self.profile.income_sources for d in s.pay_days]
+        if not pay_days:
+            return None
+        return next_due_dates(pay_days, today).min().item()
+
+    def bills_due(self, today: date, until: date) -> List:
+        """
+        Expenses falling due after `today` up to and including `until`.
+        """
+        expenses = self.profile.expenses
+        if not expenses:
+            return []
+        due = next_due_dates([e.due_day for e in expenses], today)
+        in_window = due <= np.datetime64(until, 'D')
+        return [e for e, hit in zip(expenses, in_window) if hit]
@@ -0,0 +1,184 @@
+import re
+from dataclasses import dataclass
+from datetime import date, timedelta
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from categorizer import normalize_merchant
+from transactions import TransactionStore
+
+# name -> (period in days, allowed jitter in days, minimum charges to trust it)
+PERIODS = {
+    'weekly': (7.0, 1.5, 4),
+    'fortnightly': (14.0, 2.0, 3),
+    'monthly': (30.44, 4.0, 3),
+    'quarterly': (91.3, 7.0, 3),
+    'annual': (365.25, 12.0, 2),
+}
+# Share of gaps that must fall inside the jitter window
+MIN_REGULAR_SHARE = 0.6
+# Subscriptions charge (nearly) the same amount each time
+MAX_AMOUNT_VARIATION = 0.25
+
+_WORD_RE = re.compile(r"\w+")
+
+
+@dataclass
+class RecurringCharge:
+    merchant: str
+    period: str
+    average_amount: float
+    occurrences: int
+    last_date: date
+    next_expected: date
+    matched_expense: Optional[str] = None
+
+    @property
+    def is_orphan(self) -> bool:
+        return self.matched_expense is None
+
+
+class RecurringDetector:
+    """
+    Finds periodic charges per normalized merchant and flags those that
+    don't correspond to any Expense in the profile.
+
+    All merchants are evaluated together: one lexsort by (merchant, date),
+    one diff for the gaps between consecutive charges and grouped
+    statistics, so cost grows near-linearly with history size. update()
+    only re-evaluates merchants that appear in the new statement.
+    """
+
+    def __init__(self, expenses=None):
+        # Kept by reference so later edits to the profile's expenses are seen
+        self.expenses = expenses if expenses is not None else []
+        self.results: Dict[str, RecurringCharge] = {}
+        self._history = pd.DataFrame({
+            'merchant': pd.Series(dtype=object),
+            'day': pd.Series(dtype=np.int64),
+            'amount': pd.Series(dtype=np.float64),
+        })
+
+    def fit(self, statement) -> List[RecurringCharge]:
+        self.results = {}
+        self._history = self._history.iloc[:0]
+        return self.update(statement)
+
+    def update(self, statement) -> List[RecurringCharge]:
+        """
+        Appends a statement's charges to the history and refreshes the
+        results for the merchants it touches. Takes a TransactionStore or
+        a DataFrame with the parser's Date/Description/Amount columns.
+        """
+        new = _charges(statement)
+        if not new.empty:
+            touched = new['merchant'].unique()
+            affected = pd.concat([self._history[self._history['merchant'].isin(touched)], new])
+            self._history = pd.concat([self._history, new], ignore_index=True)
+            for merchant in touched:
+                self.results.pop(merchant, None)
+            self.results.update(self._evaluate(affected))
+        return self.recurring()
+
+    def recurring(self) -> List[RecurringCharge]:
+        for charge in self.results.values():
+            charge.matched_expense = self._match_expense(charge.merchant)
+        return sorted(self.results.values(), key=lambda c: -abs(c.average_amount))
+
+    def orphans(self) -> List[RecurringCharge]:
+        return [c for c in self.recurring() if c.is_orphan]
+
+    def _evaluate(self, charges: pd.DataFrame) -> Dict[str, RecurringCharge]:
+        codes, merchants = pd.factorize(charges['merchant'])
+        days = charges['day'].to_numpy()
+        amounts = charges['amount'].to_numpy()
+
+        order = np.lexsort((days, codes))
+        codes, days, amounts = codes[order], days[order], amounts[order]
+
+        # Gaps between consecutive charges at the same merchant; same-day repeats are one charge
+        same = (codes[1:] == codes[:-1]) & (days[1:] != days[:-1])
+        gaps = pd.DataFrame({'code': codes[1:][same], 'gap': np.diff(days)[same]})
+        if gaps.empty:
+            return {}
+        grouped_gaps = gaps.groupby('code')['gap']
+        median_gap = grouped_gaps.median()
+        charge_count = grouped_gaps.size() + 1
+
+        amount_stats = pd.DataFrame({'code': codes, 'amount': amounts}).groupby('code')['amount'].agg(['mean', 'std'])
+        last_day = pd.Series(days, index=codes).groupby(level=0).max()
+
+        results = {}
+        for name, (period, jitter, min_count) in PERIODS.items():
+            candidates = median_gap.index[(median_gap - period).abs() <= jitter]
+            if not len(candidates):
+                continue
+            regular_share = ((gaps['gap'] - period).abs() <= jitter).groupby(gaps['code']).mean()
+            stats = amount_stats.loc[candidates]
+            variation = (stats['std'].fillna(0.0) / stats['mean'].abs()).fillna(0.0)
+            keep = (
+                (charge_count[candidates] >= min_count)
+                & (regular_share[candidates] >= MIN_REGULAR_SHARE)
+                & (variation <= MAX_AMOUNT_VARIATION)
+            )
+            for code in candidates[keep.to_numpy()]:
+                merchant = merchants[code]
+                last = _EPOCH + timedelta(days=int(last_day[code]))
+                results[merchant] = RecurringCharge(
+                    merchant=merchant,
+                    period=name,
+                    average_amount=float(stats.at[code, 'mean']),
+                    occurrences=int(charge_count[code]),
+                    last_date=last,
+                    next_expected=last + timedelta(days=round(period)),
+                )
+        return results
+
+    def _match_expense(self, merchant: str) -> Optional[str]:
+        """
+        The first expense whose name shares all its words with the merchant,
+        or the other way round ('netflix' and 'netflix.com', not 'rent' and
+        'parent pay').
+        """
+        words = _words(merchant)
+        if not words:
+            return None
+        for expense in self.expenses:
+            name = _words(normalize_merchant(expense.name))
+            if name and (name <= words or words <= name):
+                return expense.name
+        return None
+
+
+def _words(text: str) -> frozenset:
+    return frozenset(_WORD_RE.findall(text))
+
+
+_EPOCH = date(1970, 1, 1)
+
+
+def _charges(statement) -> pd.DataFrame:
+    """
+    Reduces a statement (TransactionStore or DataFrame) to (merchant, day
+    number, amount) charges.
+
+    When the statement has negative amounts, only those are charges;
+    otherwise every row is treated as money out. Rows whose description was
+    nothing but reference numbers have no merchant and are left out.
+    """
+    store = TransactionStore.coerce(statement)
+    if store.empty:
+        return pd.DataFrame(columns=['merchant', 'day', 'amount'])
+    amounts = store.amounts
+    named = store.merchants.astype(str) != ''
+    mask = ~np.isnat(store.dates) & ~np.isnan(amounts) & named[store.merchant_codes]
+    if (amounts < 0).any():
+        mask &= amounts < 0
+
+    return pd.DataFrame({
+        'merchant': store.merchants[store.merchant_codes[mask]],
+        'day': store.dates[mask].astype(np.int64),
+        'amount': np.abs(amounts[mask]),
+    })
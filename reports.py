@@ -0,0 +1,195 @@
+import json
+import os
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from categorizer import DEFAULT_CATEGORY
+from transactions import TransactionStore
+
+# Merchants listed in a report's top-N table
+TOP_MERCHANTS = 10
+CUBE_KEYS = ['category', 'month', 'merchant']
+CUBE_COLUMNS = CUBE_KEYS + ['total', 'spent', 'count']
+
+
+def spending_cube(data: Union[TransactionStore, pd.DataFrame]) -> pd.DataFrame:
+    """
+    Reduces transactions to one row per (category, month, merchant) with
+    the signed total, money out and transaction count.
+
+    This is the only pass over the transactions: the store's category,
+    month and merchant codes are combined into a single key and the sums
+    are bincounts over it. Every rollup in InsightsReport is then read off
+    the cube, which is a few thousand rows however long the statement is.
+    Months are 'YYYY-MM', or '' when the date doesn't parse.
+    """
+    store = TransactionStore.coerce(data)
+    if store.empty:
+        return pd.DataFrame(columns=CUBE_COLUMNS)
+    amounts = np.nan_to_num(store.amounts)
+    month_codes, months = pd.factorize(store.month_numbers())
+    merchant_count = len(store.merchants)
+
+    key = (store.category_codes.astype(np.int64) * len(months) + month_codes) * merchant_count + store.merchant_codes
+    group, keys = pd.factorize(key)
+    total = np.bincount(group, weights=amounts, minlength=len(keys))
+    spent = np.bincount(group, weights=np.where(amounts < 0, -amounts, 0.0), minlength=len(keys))
+    count = np.bincount(group, minlength=len(keys))
+
+    keys, merchant = np.divmod(keys, merchant_count)
+    category, month = np.divmod(keys, len(months))
+    month_labels = np.array([f"{m // 12:04d}-{m % 12 + 1:02d}" if m >= 0 else "" for m in months], dtype=object)
+    return pd.DataFrame({
+        'category': store.categories[category],
+        'month': month_labels[month],
+        'merchant': store.merchants[merchant],
+        'total': total,
+        'spent': spent,
+        'count': count,
+    })
+
+
+def merge_cubes(cubes: List[pd.DataFrame]) -> pd.DataFrame:
+    cubes = [c for c in cubes if not c.empty]
+    if not cubes:
+        return pd.DataFrame(columns=CUBE_COLUMNS)
+    if len(cubes) == 1:
+        return cubes[0]
+    return pd.concat(cubes, ignore_index=True).groupby(CUBE_KEYS, as_index=False, sort=False).sum()
+
+
+def _rollup(cube: pd.DataFrame, key: str) -> pd.DataFrame:
+    rolled = cube.groupby(key)[['total', 'spent', 'count']].sum()
+    rolled['average'] = rolled['total'] / rolled['count']
+    return rolled
+
+
+@dataclass
+class InsightsReport:
+    """
+    Category, month and merchant rollups of a set of transactions.
+
+    `total` columns are signed sums (spending is negative), `spent` is money
+    out as a positive number. by_month carries the month-over-month change
+    in spending; category_month is spending per category (rows) and month
+    (columns).
+    """
+    rows: int
+    total: float
+    spent: float
+    by_category: pd.DataFrame
+    by_month: pd.DataFrame
+    by_merchant: pd.DataFrame
+    category_month: pd.DataFrame
+    top_n: int = TOP_MERCHANTS
+
+    @classmethod
+    def from_cube(cls, cube: pd.DataFrame, top_n: int = TOP_MERCHANTS) -> 'InsightsReport':
+        if cube.empty:
+            empty = pd.DataFrame(columns=['total', 'spent', 'count', 'average'])
+            return cls(0, 0.0, 0.0, empty, empty.assign(spent_change=[], spent_change_pct=[]), empty,
+                       pd.DataFrame(), top_n)
+
+        by_category = _rollup(cube, 'category').sort_values('spent', ascending=False)
+        by_merchant = _rollup(cube, 'merchant').sort_values('spent', ascending=False)
+
+        dated = cube[cube['month'] != '']
+        by_month = _rollup(dated, 'month').sort_index()
+        by_month['spent_change'] = by_month['spent'].diff()
+        by_month['spent_change_pct'] = by_month['spent'].pct_change() * 100
+        category_month = dated.pivot_table(index='category', columns='month', values='spent',
+                                           aggfunc='sum', fill_value=0.0)
+
+        return cls(
+            rows=int(cube['count'].sum()),
+            total=float(cube['total'].sum()),
+            spent=float(cube['spent'].sum()),
+            by_category=by_category,
+            by_month=by_month,
+            by_merchant=by_merchant,
+            category_month=category_month,
+            top_n=top_n,
+        )
+
+    def top_merchants(self, n: Optional[int] = None) -> pd.DataFrame:
+        return self.by_merchant.head(n or self.top_n)
+
+    def insights(self) -> Dict:
+        """
+        The dictionary StatementParser.get_spending_insights returns.
+        """
+        if not self.rows:
+            return {}
+        summary = dict(sorted(self.by_category['total'].items()))
+        spending = self.by_category['spent']
+        return {
+            "summary": summary,
+            "total_spent": self.total,
+            # Category with the most money going out
+            "highest_category": spending.idxmax() if spending.any() else max(summary, key=summary.get),
+            "by_category": self._records(self.by_category),
+            "by_month": self._records(self.by_month),
+            "top_merchants": self._records(self.top_merchants()),
+        }
+
+    def to_dict(self) -> Dict:
+        return {
+            "rows": self.rows,
+            "total": self.total,
+            "spent": self.spent,
+            "by_category": self._records(self.by_category),
+            "by_month": self._records(self.by_month),
+            "top_merchants": self._records(self.top_merchants()),
+            "by_merchant": self._records(self.by_merchant),
+            "category_month": {cat: row for cat, row in self.category_month.to_dict(orient='index').items()},
+        }
+
+    def export(self, directory: str) -> List[str]:
+        """
+        Writes report.json plus one CSV per table into `directory`.
+        Returns the paths written.
+        """
+        os.makedirs(directory, exist_ok=True)
+        paths = [os.path.join(directory, "report.json")]
+        with open(paths[0], "w") as f:
+            json.dump(self.to_dict(), f, indent=4)
+        for name, table in (("by_category", self.by_category), ("by_month", self.by_month),
+                            ("by_merchant", self.by_merchant), ("category_month", self.category_month)):
+            path = os.path.join(directory, f"{name}.csv")
+            table.to_csv(path)
+            paths.append(path)
+        return paths
+
+    @staticmethod
+    def _records(table: pd.DataFrame) -> Dict[str, Dict]:
+        # NaN (e.g. the first month's change) becomes null in JSON
+        return {str(k): {c: (None if pd.isna(v) else float(v)) for c, v in row.items()}
+                for k, row in table.to_dict(orient='index').items()}
+
+
+class LedgerReports:
+    """
+    Reports straight from the SQLite ledger: one GROUP BY query builds the
+    cube, and reports are cached until the ledger changes.
+    """
+
+    def __init__(self, db):
+        self.db = db
+        self._cache: Dict[Tuple, Tuple[int, InsightsReport]] = {}
+
+    def report(self, start_date: Optional[str] = None, end_date: Optional[str] = None,
+               top_n: int = TOP_MERCHANTS) -> InsightsReport:
+        key = (start_date, end_date, top_n)
+        version = self.db.ledger_version()
+        cached = self._cache.get(key)
+        if cached is None or cached[0] != version:
+            cube = pd.DataFrame(self.db.spending_cube(start_date, end_date), columns=CUBE_COLUMNS)
+            cube['category'] = cube['category'].fillna(DEFAULT_CATEGORY)
+            cached = self._cache[key] = (version, InsightsReport.from_cube(cube, top_n))
+        return cached[1]
+
+    def annual(self, year: int, top_n: int = TOP_MERCHANTS) -> InsightsReport:
+        return self.report(f"{year:04d}-01-01", f"{year:04d}-12-31", top_n)
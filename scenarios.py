@@ -0,0 +1,107 @@
+from dataclasses import dataclass
+from datetime import date
+from typing import Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from debt import debt_accounts, extra_capacity
+from engine import STRATEGY_SPLITS, BudgetStrategy
+from projection import CashFlowProjector, add_months
+
+
+@dataclass
+class StrategyComparison:
+    """
+    One row per (strategy, balance delta, income delta) scenario, held as columns.
+    """
+    strategy: np.ndarray
+    balance_delta: np.ndarray
+    income_delta: np.ndarray
+    critical_total: float
+    extra_debt_payment: np.ndarray
+    savings_contribution: np.ndarray
+    safe_to_spend: np.ndarray
+    projected_min_balance: np.ndarray
+
+    def __len__(self):
+        return len(self.strategy)
+
+    def rows(self) -> List[Dict]:
+        return [
+            {
+                "strategy": self.strategy[i],
+                "balance_delta": float(self.balance_delta[i]),
+                "income_delta": float(self.income_delta[i]),
+                "critical_total": self.critical_total,
+                "extra_debt_payment": float(self.extra_debt_payment[i]),
+                "savings_contribution": float(self.savings_contribution[i]),
+                "safe_to_spend": float(self.safe_to_spend[i]),
+                "projected_min_balance": float(self.projected_min_balance[i]),
+            }
+            for i in range(len(self))
+        ]
+
+
+def _positive(values: np.ndarray) -> np.ndarray:
+    # Like max(0, x) per element, without np.maximum's negative zeros
+    return np.where(values > 0, values, 0.0)
+
+
+def evaluate_strategies(profile, today: date, balance_deltas: Sequence[float] = (0.0,),
+                        income_deltas: Sequence[float] = (0.0,), months: int = 1,
+                        reserve: Optional[Callable[[date], float]] = None) -> StrategyComparison:
+    """
+    Evaluates every BudgetStrategy across a grid of what-if scenarios in one pass.
+
+    balance_deltas are added to the current balance; income_deltas scale all
+    income (e.g. -0.1 for a 10% pay cut). The upcoming bill window and the
+    daily cash-flow projection are computed once and shared by every
+    scenario. projected_min_balance is the lowest balance over the next
+    `months` months after the strategy's debt and savings transfers leave
+    the account. `reserve`, given the next payday, returns spending to hold
+    back on top of the bills, as in FinanceEngine.split_money. As there,
+    the extra debt payment is capped at what the debts can still take.
+    """
+    projector = CashFlowProjector(profile)
+    payday = projector.next_payday(today)
+    window_end = payday if payday is not None else add_months(today, 1).item()
+    critical_total = sum(e.amount for e in projector.bills_due(today, window_end) if e.priority == 1)
+    held_back = critical_total + (reserve(window_end) if reserve else 0.0)
+
+    projection = projector.project(today, months)
+    cum_income = np.cumsum(projection.income)
+    cum_outgoings = np.cumsum(projection.outgoings)
+
+    strategies = list(BudgetStrategy)
+    rates = np.array([STRATEGY_SPLITS[s] for s in strategies])
+    income_deltas = np.asarray(income_deltas, dtype=np.float64)
+    s_idx, b_idx, i_idx = (g.ravel() for g in np.meshgrid(
+        np.arange(len(strategies)), np.arange(len(balance_deltas)), np.arange(len(income_deltas)), indexing='ij'))
+
+    balance = profile.balance + np.asarray(balance_deltas, dtype=np.float64)[b_idx]
+    safe = balance - held_back
+    extra_debt = _positive(safe * rates[s_idx, 0])
+    debts = debt_accounts(profile.expenses)
+    if debts:
+        extra_debt = np.minimum(extra_debt, extra_capacity(debts))
+    savings = _positive(safe * rates[s_idx, 1])
+    safe = safe - extra_debt - savings
+    safe = safe - safe * rates[s_idx, 2]
+
+    # Lowest point of the projected running net flow, once per income scenario
+    if len(cum_income):
+        net = (1.0 + income_deltas)[:, None] * cum_income[None, :] - cum_outgoings[None, :]
+        lowest_flow = np.minimum(net.min(axis=1), 0.0)
+    else:
+        lowest_flow = np.zeros(len(income_deltas))
+
+    return StrategyComparison(
+        strategy=np.array([s.value for s in strategies], dtype=object)[s_idx],
+        balance_delta=np.asarray(balance_deltas, dtype=np.float64)[b_idx],
+        income_delta=income_deltas[i_idx],
+        critical_total=critical_total,
+        extra_debt_payment=extra_debt,
+        savings_contribution=savings,
+        safe_to_spend=_positive(safe),
+        projected_min_balance=balance - extra_debt - savings + lowest_flow[i_idx],
+    )
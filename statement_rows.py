@@ -0,0 +1,209 @@
+from datetime import date
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from database import TRANSACTION_COLUMNS
+from dates import parse_statement_dates
+
+# Ledger column shown under each statement heading
+LEDGER_COLUMNS = {'Date': 'date', 'Description': 'description', 'Amount': 'amount', 'Category': 'category'}
+# Rows fetched from SQLite per query, so scrolling doesn't hit the database per line
+LEDGER_PAGE_ROWS = 200
+
+
+def _format_value(value) -> str:
+    # NaT (an unparseable date) is a datetime too, but can't be formatted
+    if value is None or pd.isna(value):
+        return ""
+    if isinstance(value, float):
+        return f"{value:.2f}"
+    if isinstance(value, (pd.Timestamp, date)):
+        return value.strftime('%Y-%m-%d')
+    return str(value)
+
+
+class FrameRows:
+    """
+    Statement rows backed by parsed DataFrame chunks.
+
+    Chunks are kept as parsed, so appending during an import is O(1), and
+    only the rows asked for by rows() are formatted. Sorting and filtering
+    produce an array of row positions; the frame itself is never copied
+    or reordered.
+    """
+
+    def __init__(self, df: Optional[pd.DataFrame] = None):
+        self.columns: List[str] = list(df.columns) if df is not None else []
+        self._chunks: List[pd.DataFrame] = []
+        self._offsets = [0]
+        self._frame: Optional[pd.DataFrame] = None
+        self._dates: Optional[pd.Series] = None
+        self.sort_column: Optional[str] = None
+        self.descending = False
+        self.category: Optional[str] = None
+        self.start_date: Optional[date] = None
+        self.end_date: Optional[date] = None
+        self._view: Optional[np.ndarray] = None
+        if df is not None:
+            self.append(df)
+
+    def append(self, df: pd.DataFrame):
+        if df.empty:
+            return
+        if not self.columns:
+            self.columns = list(df.columns)
+        self._chunks.append(df)
+        self._offsets.append(self._offsets[-1] + len(df))
+        self._frame = None
+        self._dates = None
+        self._view = None
+
+    def __len__(self):
+        if not self._is_filtered():
+            return self._offsets[-1]
+        return len(self._positions())
+
+    def sort(self, column: Optional[str], descending: bool = False):
+        self.sort_column = column
+        self.descending = descending
+        self._view = None
+
+    def filter(self, category: Optional[str] = None, start_date: Optional[date] = None,
+               end_date: Optional[date] = None):
+        self.category = category
+        self.start_date = start_date
+        self.end_date = end_date
+        self._view = None
+
+    def rows(self, start: int, stop: int) -> List[Tuple[str, ...]]:
+        """
+        Formatted rows for view positions [start, stop).
+        """
+        if not self._is_filtered():
+            frame = self._slice(start, stop)
+        else:
+            frame = self._whole().iloc[self._positions()[start:stop]]
+        return [tuple(_format_value(v) for v in row) for row in frame.itertuples(index=False, name=None)]
+
+    def _is_filtered(self) -> bool:
+        return (self.sort_column is not None or self.category is not None
+                or self.start_date is not None or self.end_date is not None)
+
+    def _slice(self, start: int, stop: int) -> pd.DataFrame:
+        # Unsorted and unfiltered: read straight from the chunks the range spans
+        first = int(np.searchsorted(self._offsets, start, side='right')) - 1
+        pieces = []
+        for i in range(max(first, 0), len(self._chunks)):
+            lo, hi = self._offsets[i], self._offsets[i + 1]
+            if lo >= stop:
+                break
+            pieces.append(self._chunks[i].iloc[max(start - lo, 0):min(stop, hi) - lo])
+        if not pieces:
+            return pd.DataFrame(columns=self.columns)
+        return pieces[0] if len(pieces) == 1 else pd.concat(pieces)
+
+    def _whole(self) -> pd.DataFrame:
+        if self._frame is None:
+            self._frame = self._chunks[0] if len(self._chunks) == 1 else pd.concat(self._chunks, ignore_index=True)
+            self._chunks = [self._frame]
+            self._offsets = [0, len(self._frame)]
+        return self._frame
+
+    def _parsed_dates(self) -> pd.Series:
+        if self._dates is None:
+            self._dates = parse_statement_dates(self._whole()['Date'])
+        return self._dates
+
+    def _positions(self) -> np.ndarray:
+        if self._view is not None:
+            return self._view
+        frame = self._whole()
+        mask = np.ones(len(frame), dtype=bool)
+        if self.category is not None and 'Category' in frame:
+            mask &= (frame['Category'] == self.category).to_numpy()
+        if (self.start_date is not None or self.end_date is not None) and 'Date' in frame:
+            dates = self._parsed_dates()
+            if self.start_date is not None:
+                mask &= (dates >= pd.Timestamp(self.start_date)).to_numpy()
+            if self.end_date is not None:
+                mask &= (dates <= pd.Timestamp(self.end_date)).to_numpy()
+
+        positions = np.flatnonzero(mask)
+        if self.sort_column is not None and self.sort_column in frame:
+            if self.sort_column == 'Date':
+                key = self._parsed_dates()
+            elif self.sort_column == 'Amount':
+                key = pd.to_numeric(frame['Amount'], errors='coerce')
+            else:
+                key = frame[self.sort_column].astype(str)
+            key = pd.Series(key.to_numpy()[positions], index=positions)
+            positions = key.sort_values(ascending=not self.descending, kind='stable',
+                                        na_position='last').index.to_numpy()
+        self._view = positions
+        return positions
+
+
+class LedgerRows:
+    """
+    Rows read page by page from the SQLite transaction ledger.
+
+    Sorting and filtering are done by the database, so only the page
+    around the visible rows is ever fetched.
+    """
+
+    def __init__(self, db, columns: Sequence[str] = tuple(LEDGER_COLUMNS)):
+        self.db = db
+        self.columns = list(columns)
+        self._fields = [LEDGER_COLUMNS[c] for c in self.columns]
+        self.sort_column: Optional[str] = 'Date'
+        self.descending = False
+        self.category: Optional[str] = None
+        self.start_date: Optional[date] = None
+        self.end_date: Optional[date] = None
+        self._count: Optional[int] = None
+        self._page_start = 0
+        self._page: List[Tuple] = []
+
+    def __len__(self):
+        if self._count is None:
+            self._count = self.db.count_transactions(*self._filters())
+        return self._count
+
+    def sort(self, column: Optional[str], descending: bool = False):
+        self.sort_column = column
+        self.descending = descending
+        self._reset()
+
+    def filter(self, category: Optional[str] = None, start_date: Optional[date] = None,
+               end_date: Optional[date] = None):
+        self.category = category
+        self.start_date = start_date
+        self.end_date = end_date
+        self._reset()
+
+    def rows(self, start: int, stop: int) -> List[Tuple[str, ...]]:
+        if start < self._page_start or stop > self._page_start + len(self._page):
+            self._page_start = start
+            self._page = self.db.query_transactions(
+                *self._filters(), limit=max(stop - start, LEDGER_PAGE_ROWS), offset=start,
+                order_by=LEDGER_COLUMNS.get(self.sort_column, 'date'), descending=self.descending)
+        indices = [_LEDGER_INDEX[field] for field in self._fields]
+        page = self._page[start - self._page_start:stop - self._page_start]
+        return [tuple(_format_value(row[i]) for i in indices) for row in page]
+
+    def _filters(self):
+        return (
+            self.start_date.isoformat() if self.start_date else None,
+            self.end_date.isoformat() if self.end_date else None,
+            self.category,
+        )
+
+    def _reset(self):
+        self._count = None
+        self._page_start = 0
+        self._page = []
+
+
+_LEDGER_INDEX = {name: i for i, name in enumerate(TRANSACTION_COLUMNS)}
@@ -0,0 +1,135 @@
+from datetime import date
+from typing import List, Optional, Sequence, Tuple
+
+from rich.segment import Segment
+from textual import events
+from textual.geometry import Size
+from textual.scroll_view import ScrollView
+from textual.strip import Strip
+
+from instrumentation import span, timed
+
+# Rows sampled to size the columns
+WIDTH_SAMPLE_ROWS = 200
+MAX_COLUMN_WIDTH = 40
+
+
+class StatementTable(ScrollView, can_focus=True):
+    """
+    Virtualized table over a statement_rows.FrameRows or LedgerRows source.
+
+    Only the rows on screen are fetched and formatted, so a 100k-row
+    statement costs the same to show as a small one. Clicking a heading
+    sorts by that column; clicking it again reverses the order.
+    """
+
+    DEFAULT_CSS = """
+    StatementTable { height: 1fr; }
+    StatementTable > .statement-table--header { text-style: bold; background: $panel; }
+    StatementTable > .statement-table--row { }
+    """
+    COMPONENT_CLASSES = {"statement-table--header", "statement-table--row"}
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.source = None
+        self._widths: List[int] = []
+        self._window: Tuple[int, int] = (0, 0)
+        self._window_rows: List[Tuple[str, ...]] = []
+
+    def set_source(self, source):
+        self.source = source
+        self._widths = []
+        self.refresh_rows()
+        self.scroll_to(0, 0, animate=False)
+
+    def clear(self):
+        self.set_source(None)
+
+    def refresh_rows(self):
+        """
+        Call after the source's rows, sort or filter change.
+        """
+        self._window = (0, 0)
+        if self.source is None:
+            self.virtual_size = Size(0, 0)
+        else:
+            if not self._widths:
+                self._widths = self._measure()
+            self.virtual_size = Size(sum(self._widths) + len(self._widths), len(self.source) + 1)
+        self.refresh()
+
+    @timed("tui.sort")
+    def sort(self, column: str):
+        if self.source is None:
+            return
+        descending = self.source.sort_column == column and not self.source.descending
+        self.source.sort(column, descending)
+        self.refresh_rows()
+
+    @timed("tui.apply_filter")
+    def apply_filter(self, category: Optional[str] = None, start_date: Optional[date] = None,
+                     end_date: Optional[date] = None):
+        if self.source is None:
+            return
+        self.source.filter(category, start_date, end_date)
+        self.refresh_rows()
+        self.scroll_to(y=0, animate=False)
+
+    def _measure(self) -> List[int]:
+        sample = self.source.rows(0, WIDTH_SAMPLE_ROWS) if len(self.source) else []
+        return [
+            min(MAX_COLUMN_WIDTH, max([len(col) + 2] + [len(row[i]) for row in sample]))
+            for i, col in enumerate(self.source.columns)
+        ]
+
+    def _visible_rows(self, first: int) -> List[Tuple[str, ...]]:
+        # One fetch per scroll position, shared by every line drawn
+        window = (first, first + self.size.height)
+        if window != self._window:
+            self._window = window
+            with span("tui.fetch_rows"):
+                self._window_rows = self.source.rows(*window)
+        return self._window_rows
+
+    def _cells(self, values: Sequence[str]) -> str:
+        cells = []
+        for value, width in zip(values, self._widths):
+            if len(value) > width:
+                value = value[:width - 1] + "…"
+            cells.append(value.ljust(width))
+        return " ".join(cells)
+
+    @timed("tui.render_line")
+    def render_line(self, y: int) -> Strip:
+        scroll_x, scroll_y = self.scroll_offset
+        width = self.size.width
+        if self.source is None:
+            return Strip.blank(width, self.rich_style)
+
+        if y == 0:
+            headings = []
+            for column in self.source.columns:
+                if column == self.source.sort_column:
+                    column += " ▼" if self.source.descending else " ▲"
+                headings.append(column)
+            text, style = self._cells(headings), self.get_component_rich_style("statement-table--header")
+        else:
+            rows = self._visible_rows(scroll_y)
+            index = y - 1
+            text = self._cells(rows[index]) if index < len(rows) else ""
+            style = self.get_component_rich_style("statement-table--row")
+
+        strip = Strip([Segment(text.ljust(scroll_x + width), style)])
+        return strip.crop(scroll_x, scroll_x + width)
+
+    def on_click(self, event: events.Click) -> None:
+        offset = event.get_content_offset(self)
+        if self.source is None or offset is None or offset.y != 0:
+            return
+        x = offset.x + self.scroll_offset.x
+        for column, width in zip(self.source.columns, self._widths):
+            if x < width + 1:
+                self.sort(column)
+                return
+            x -= width + 1
@@ -0,0 +1,199 @@
+import sys
+from dataclasses import dataclass
+from typing import List, Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+
+from categorizer import DEFAULT_CATEGORY, normalize_merchants
+from dates import parse_statement_dates
+
+
+def _intern(values) -> np.ndarray:
+    # Shared string objects, so repeated merchants/categories cost one copy per process
+    return np.array([sys.intern(str(v)) for v in values], dtype=object)
+
+
+def _remap(code_arrays: Sequence[np.ndarray], unique_arrays: Sequence[np.ndarray], dtype):
+    """
+    Re-codes several (codes, uniques) pairs against their combined uniques.
+    Also returns where each combined unique first appears among the inputs'.
+    """
+    combined_codes, combined = pd.factorize(np.concatenate(unique_arrays))
+    codes, start = [], 0
+    for part_codes, part_uniques in zip(code_arrays, unique_arrays):
+        mapping = combined_codes[start:start + len(part_uniques)]
+        codes.append(mapping[part_codes].astype(dtype))
+        start += len(part_uniques)
+    _, first = np.unique(combined_codes, return_index=True)
+    return np.concatenate(codes), np.asarray(combined, dtype=object), first
+
+
+@dataclass
+class TransactionStore:
+    """
+    Parsed transactions held column by column in compact form.
+
+    Dates are datetime64[D] (NaT where a date didn't parse) and amounts
+    float64 (NaN where unparseable). Descriptions and categories are small
+    integer codes into arrays of unique, interned strings, and each unique
+    description maps to its normalized merchant. Aggregations work on the
+    codes directly, so dates are parsed and merchants normalized once per
+    import rather than once per analysis.
+    """
+    dates: np.ndarray
+    amounts: np.ndarray
+    description_codes: np.ndarray
+    category_codes: np.ndarray
+    descriptions: np.ndarray
+    merchant_of: np.ndarray   # merchant code of each unique description
+    merchants: np.ndarray
+    categories: np.ndarray
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame) -> 'TransactionStore':
+        """
+        Builds a store from the parser's Date/Description/Amount/Category
+        columns (lowercase names are accepted too). Layouts without a date,
+        amount or description column give NaT dates (an unknown month), NaN
+        amounts or empty descriptions.
+        """
+        df = df.rename(columns=lambda c: str(c).capitalize())
+        if df.empty:
+            return cls.blank()
+
+        if 'Description' in df:
+            description_codes, descriptions = pd.factorize(df['Description'].astype(str))
+        else:
+            description_codes, descriptions = np.zeros(len(df), dtype=np.intp), ['']
+        merchant_of, merchants = pd.factorize(normalize_merchants(pd.Series(descriptions, dtype=object)))
+        if 'Category' in df:
+            category_codes, categories = pd.factorize(df['Category'].fillna(DEFAULT_CATEGORY))
+        else:
+            category_codes, categories = np.zeros(len(df), dtype=np.intp), [DEFAULT_CATEGORY]
+
+        if 'Date' in df:
+            dates = parse_statement_dates(df['Date']).to_numpy(dtype='datetime64[D]')
+        else:
+            dates = np.full(len(df), np.datetime64('NaT'), dtype='datetime64[D]')
+        if 'Amount' in df:
+            amounts = pd.to_numeric(df['Amount'], errors='coerce').to_numpy(dtype=np.float64)
+        else:
+            amounts = np.full(len(df), np.nan)
+
+        return cls(
+            dates=dates,
+            amounts=amounts,
+            description_codes=description_codes.astype(np.int32),
+            category_codes=category_codes.astype(np.int16),
+            descriptions=np.asarray(descriptions, dtype=object),
+            merchant_of=merchant_of.astype(np.int32),
+            merchants=_intern(merchants),
+            categories=_intern(categories),
+        )
+
+    @classmethod
+    def blank(cls) -> 'TransactionStore':
+        no_strings = np.array([], dtype=object)
+        return cls(np.array([], dtype='datetime64[D]'), np.array([], dtype=np.float64),
+                   np.array([], dtype=np.int32), np.array([], dtype=np.int16),
+                   no_strings, np.array([], dtype=np.int32), no_strings, no_strings)
+
+    @classmethod
+    def coerce(cls, data: Union['TransactionStore', pd.DataFrame]) -> 'TransactionStore':
+        return data if isinstance(data, cls) else cls.from_frame(data)
+
+    @classmethod
+    def concat(cls, stores: List['TransactionStore']) -> 'TransactionStore':
+        stores = [s for s in stores if len(s)]
+        if not stores:
+            return cls.blank()
+        if len(stores) == 1:
+            return stores[0]
+
+        description_codes, descriptions, first = _remap([s.description_codes for s in stores],
+                                                        [s.descriptions for s in stores], np.int32)
+        category_codes, categories, _ = _remap([s.category_codes for s in stores],
+                                               [s.categories for s in stores], np.int16)
+        # A description always normalizes to the same merchant, so any store's answer will do
+        merchant_names = np.concatenate([s.merchants[s.merchant_of] for s in stores])
+        merchant_of, merchants = pd.factorize(merchant_names[first])
+        return cls(
+            dates=np.concatenate([s.dates for s in stores]),
+            amounts=np.concatenate([s.amounts for s in stores]),
+            description_codes=description_codes,
+            category_codes=category_codes,
+            descriptions=descriptions,
+            merchant_of=merchant_of.astype(np.int32),
+            merchants=_intern(merchants),
+            categories=_intern(categories),
+        )
+
+    def __len__(self):
+        return len(self.amounts)
+
+    @property
+    def empty(self) -> bool:
+        return len(self) == 0
+
+    @property
+    def merchant_codes(self) -> np.ndarray:
+        return self.merchant_of[self.description_codes]
+
+    def month_numbers(self) -> np.ndarray:
+        """
+        year * 12 + month - 1 for each transaction, -1 where the date is unknown.
+        """
+        months = self.dates.astype('datetime64[M]').astype(np.int64) + 1970 * 12
+        return np.where(np.isnat(self.dates), -1, months)
+
+    def take(self, mask: np.ndarray) -> 'TransactionStore':
+        """
+        The selected rows, sharing this store's unique strings.
+        """
+        return TransactionStore(self.dates[mask], self.amounts[mask], self.description_codes[mask],
+                                self.category_codes[mask], self.descriptions, self.merchant_of,
+                                self.merchants, self.categories)
+
+    def day_strings(self) -> pd.Series:
+        """
+        'YYYY-MM-DD' for each transaction, NaN where the date is unknown.
+        Each distinct day is formatted once.
+        """
+        days, day_codes = np.unique(self.dates, return_inverse=True)
+        return pd.Series(days).dt.strftime('%Y-%m-%d').take(day_codes).reset_index(drop=True)
+
+    def fingerprints(self, days: Optional[pd.Series] = None) -> np.ndarray:
+        """
+        The ledger's int64 key for each transaction: a hash of date,
+        description, amount and the occurrence number of that triple within
+        the statement, so genuine same-day repeats are kept while
+        overlapping statements don't double-count.
+        """
+        if days is None:
+            days = self.day_strings()
+        descriptions = pd.Series(self.descriptions).astype(str).take(self.description_codes).reset_index(drop=True)
+        keys = pd.DataFrame({'date': days, 'description': descriptions, 'amount': pd.Series(self.amounts)})
+        keys['occurrence'] = keys.groupby(['date', 'description', 'amount'], dropna=False).cumcount()
+        return pd.util.hash_pandas_object(keys, index=False).to_numpy().view(np.int64)
+
+    def to_frame(self) -> pd.DataFrame:
+        """
+        The parser's columns, with datetime64 dates and categorical text.
+        """
+        return pd.DataFrame({
+            'Date': self.dates.astype('datetime64[ns]'),
+            'Description': pd.Categorical.from_codes(self.description_codes, self.descriptions),
+            'Amount': self.amounts,
+            'Category': pd.Categorical.from_codes(self.category_codes, self.categories),
+        })
+
+    @property
+    def nbytes(self) -> int:
+        """
+        Approximate memory held, counting each unique string once.
+        """
+        arrays = (self.dates, self.amounts, self.description_codes, self.category_codes, self.merchant_of)
+        strings = (self.descriptions, self.merchants, self.categories)
+        return (sum(a.nbytes for a in arrays + strings)
+                + sum(sys.getsizeof(s) for values in strings for s in values))